@@ -1,11 +1,20 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Request, request, jsonify
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 import os
+import math
+import threading
 from dotenv import load_dotenv
 import logging
-from hebrew_nlp import HebrewNLPProcessor
+from werkzeug.exceptions import HTTPException
+from hebrew_nlp import HebrewNLPProcessor, ANALYSIS_PROFILES
+from single_flight import SingleFlight, make_key
+from upload import UploadTooLarge, iter_stream_lines
+from corpus_store import CorpusStore
+from near_duplicates import MinHasher, LSHIndex, song_phonetics, phonetic_shingles
+import numpy as np
+from rhyme_scoring import rhyme_ending
 
 # Load environment variables
 load_dotenv()
@@ -14,18 +23,178 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class LyricsRequest(Request):
+    """Request whose body size limit applies to lyrics uploads only"""
+
+    @property
+    def max_content_length(self):
+        # Werkzeug rejects bodies above this while parsing, leave room for
+        # multipart headers. Other endpoints keep their bodies unbounded.
+        if self.endpoint == 'analyze_upload':
+            return ANALYSIS_MAX_UPLOAD_BYTES + 64 * 1024
+        return None
+
+
 app = Flask(__name__)
+app.request_class = LyricsRequest
 CORS(app)
 
-# Rate limiting
+# Rate limiting, RATELIMIT_ENABLED=false turns it off (e.g. for load tests)
+app.config['RATELIMIT_ENABLED'] = os.environ.get('RATELIMIT_ENABLED', 'true').lower() == 'true'
 limiter = Limiter(
     key_func=get_remote_address,
     default_limits=["200 per day", "50 per hour"]
 )
 limiter.init_app(app)
 
+def _optional_int_env(name):
+    """Read an optional integer setting from the environment"""
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+# G2P inference configuration, tune workers x threads to the host's cores
+G2P_INTRA_OP_THREADS = _optional_int_env('G2P_INTRA_OP_THREADS')
+G2P_INTER_OP_THREADS = _optional_int_env('G2P_INTER_OP_THREADS')
+G2P_EXECUTION_MODE = os.environ.get('G2P_EXECUTION_MODE') or None
+G2P_GRAPH_OPTIMIZATION = os.environ.get('G2P_GRAPH_OPTIMIZATION') or None
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', 1))
+
+# G2P model instances per worker, match it to the gunicorn gthread --threads.
+# With ANALYSIS_PARALLEL_MODE=thread it is raised to ANALYSIS_PARALLEL_WORKERS.
+G2P_POOL_SIZE = int(os.environ.get('G2P_POOL_SIZE', 1))
+
+# Parallel transcription of long lyrics: off, thread or process
+ANALYSIS_PARALLEL_MODE = os.environ.get('ANALYSIS_PARALLEL_MODE', 'off')
+ANALYSIS_PARALLEL_WORKERS = _optional_int_env('ANALYSIS_PARALLEL_WORKERS')
+ANALYSIS_PARALLEL_THRESHOLD = int(os.environ.get('ANALYSIS_PARALLEL_THRESHOLD', 500))
+
 # Initialize Hebrew NLP processor
-nlp_processor = HebrewNLPProcessor()
+nlp_processor = HebrewNLPProcessor(
+    intra_op_threads=G2P_INTRA_OP_THREADS,
+    inter_op_threads=G2P_INTER_OP_THREADS,
+    execution_mode=G2P_EXECUTION_MODE,
+    graph_optimization=G2P_GRAPH_OPTIMIZATION,
+    parallel_mode=ANALYSIS_PARALLEL_MODE,
+    parallel_workers=ANALYSIS_PARALLEL_WORKERS,
+    parallel_threshold=ANALYSIS_PARALLEL_THRESHOLD,
+    g2p_pool_size=G2P_POOL_SIZE
+)
+
+# Concurrent requests with the same lyrics share a single analysis
+ANALYSIS_COALESCE_TIMEOUT = float(os.environ.get('ANALYSIS_COALESCE_TIMEOUT', 30))
+analysis_flight = SingleFlight()
+
+# Default and maximum analysis time budget in seconds, kept below the
+# frontend's 30 second request timeout
+ANALYSIS_TIME_BUDGET = float(os.environ.get('ANALYSIS_TIME_BUDGET', 25))
+
+# Maximum size of an uploaded lyrics file, enforced while reading
+ANALYSIS_MAX_UPLOAD_BYTES = int(os.environ.get('ANALYSIS_MAX_UPLOAD_BYTES', 2 * 1024 * 1024))
+
+# Optional local corpus of analyzed songs, enabled by setting CORPUS_DB_PATH
+CORPUS_DB_PATH = os.environ.get('CORPUS_DB_PATH')
+corpus_store = CorpusStore(CORPUS_DB_PATH) if CORPUS_DB_PATH else None
+
+# Near-duplicate index over the corpus, rebuilt from stored signatures.
+# Each worker process has its own index and catches up with songs stored
+# by other workers before every query.
+minhasher = MinHasher()
+near_duplicate_index = LSHIndex()
+_index_sync_lock = threading.Lock()
+_index_synced_id = 0
+
+def _sync_near_duplicate_index():
+    """Load signatures stored since the last sync into the index"""
+    global _index_synced_id
+    with _index_sync_lock:
+        for song_id, signature in corpus_store.iter_signatures(after_id=_index_synced_id):
+            near_duplicate_index.add(song_id, np.frombuffer(signature, dtype=np.uint32))
+            _index_synced_id = song_id
+
+if corpus_store is not None:
+    _sync_near_duplicate_index()
+    logger.info(f"Loaded {len(near_duplicate_index)} songs into the near-duplicate index")
+
+def _find_near_duplicates(signature, threshold=0.5, limit=10, exclude=None):
+    """Query the near-duplicate index and attach song titles"""
+    _sync_near_duplicate_index()
+    matches = [(song_id, similarity)
+               for song_id, similarity in near_duplicate_index.query(signature, threshold, limit + 1)
+               if song_id != exclude][:limit]
+    titles = corpus_store.song_titles([song_id for song_id, _ in matches])
+    return [
+        {"song_id": song_id, "title": titles.get(song_id), "similarity": round(similarity, 3)}
+        for song_id, similarity in matches
+    ]
+
+def _parse_analysis_options(values):
+    """
+    Validate the optional analysis settings of a request
+    
+    Args:
+        values: JSON body or query string arguments
+        
+    Returns:
+        Tuple of (options dict, None) or (None, error message)
+    """
+    expand_repeats = values.get('expand_repeats', False)
+    if isinstance(expand_repeats, str):
+        expand_repeats = expand_repeats.lower() in ('1', 'true', 'yes')
+    
+    profile = values.get('profile', 'full')
+    if not isinstance(profile, str) or profile not in ANALYSIS_PROFILES:
+        return None, f"Unknown profile, expected one of: {', '.join(ANALYSIS_PROFILES)}"
+    
+    time_budget = values.get('time_budget', ANALYSIS_TIME_BUDGET)
+    try:
+        if isinstance(time_budget, bool):
+            raise ValueError
+        time_budget = float(time_budget)
+    except (TypeError, ValueError):
+        time_budget = 0
+    if not math.isfinite(time_budget) or time_budget <= 0:
+        return None, "'time_budget' must be a positive number of seconds"
+    
+    return {
+        "expand_repeats": bool(expand_repeats),
+        "profile": profile,
+        "time_budget": min(time_budget, ANALYSIS_TIME_BUDGET)
+    }, None
+
+def _report_runtime_config():
+    """Log the effective G2P configuration at startup"""
+    config = nlp_processor.runtime_config()
+    logger.info(f"G2P runtime configuration: {config} (workers: {WEB_CONCURRENCY})")
+    
+    cpu_count = config["cpu_count"] or 1
+    threads = (config["intra_op_threads"] or cpu_count) * config["g2p_pool_size"]
+    if config["g2p_backend"] != "fallback" and WEB_CONCURRENCY * threads > cpu_count:
+        logger.warning(f"{WEB_CONCURRENCY} workers x {threads} G2P threads oversubscribe "
+                       f"{cpu_count} cores, consider lowering G2P_INTRA_OP_THREADS")
+
+_report_runtime_config()
+
+# Health check configuration
+WARMUP_ON_STARTUP = os.environ.get('WARMUP_ON_STARTUP', 'true').lower() == 'true'
+SELF_TEST_INTERVAL = int(os.environ.get('SELF_TEST_INTERVAL', 60))
+
+_self_test_stop = threading.Event()
+
+def _self_test_loop():
+    """Refresh the cached model self-test in the background"""
+    while True:
+        try:
+            nlp_processor.self_test()
+        except Exception as e:
+            logger.error(f"Background self-test failed: {e}")
+        if _self_test_stop.wait(SELF_TEST_INTERVAL):
+            return
+
+if WARMUP_ON_STARTUP:
+    nlp_processor.warmup()
+
+if SELF_TEST_INTERVAL > 0:
+    threading.Thread(target=_self_test_loop, name="self-test", daemon=True).start()
 
 @app.route('/')
 def home():
@@ -44,7 +213,10 @@ def analyze_lyrics():
     
     Expected input:
     {
-        "lyrics": "Hebrew rap lyrics text here"
+        "lyrics": "Hebrew rap lyrics text here",
+        "expand_repeats": false,  (optional)
+        "profile": "full",  (optional, "fast" or "full")
+        "time_budget": 10  (optional, seconds)
     }
     
     Returns:
@@ -54,7 +226,9 @@ def analyze_lyrics():
             "lines": [...],
             "rhyme_scheme": "AABB",
             "rhyme_groups": {...},
-            "statistics": {...}
+            "repeated_sections": [...],
+            "statistics": {...},
+            "analysis": {"profile": ..., "degraded": ..., ...}
         }
     }
     """
@@ -77,13 +251,33 @@ def analyze_lyrics():
         
         # Process the Hebrew lyrics
         logger.info(f"Processing lyrics with {len(lyrics)} characters")
-        analysis_result = nlp_processor.analyze_lyrics(lyrics)
+        options, error = _parse_analysis_options(data)
+        if error:
+            return jsonify({
+                "success": False,
+                "error": error
+            }), 400
+        
+        key = make_key(nlp_processor.preprocess_text(lyrics), *sorted(options.items()))
+        analysis_result = analysis_flight.do(
+            key,
+            lambda: nlp_processor.analyze_lyrics(lyrics, **options),
+            timeout=ANALYSIS_COALESCE_TIMEOUT
+        )
         
         return jsonify({
             "success": True,
             "data": analysis_result
         })
         
+    except HTTPException:
+        raise
+    except TimeoutError:
+        logger.warning("Timed out waiting for an identical in-flight analysis")
+        return jsonify({
+            "success": False,
+            "error": "Analysis is taking too long, please try again"
+        }), 503
     except Exception as e:
         logger.error(f"Error analyzing lyrics: {str(e)}")
         return jsonify({
@@ -91,18 +285,288 @@ def analyze_lyrics():
             "error": "Internal server error occurred while analyzing lyrics"
         }), 500
 
+@app.route('/analyze/upload', methods=['POST'])
+@limiter.limit("10 per minute")
+def analyze_upload():
+    """
+    Analyze Hebrew rap lyrics uploaded as a text file
+    
+    Accepts either a text/plain body or a multipart/form-data upload with a
+    'file' field. A text/plain body is read incrementally and lines are fed
+    to the processor as they are decoded; bodies above
+    ANALYSIS_MAX_UPLOAD_BYTES are rejected while reading. A multipart upload
+    is parsed by werkzeug first, which spools the whole file (to disk above
+    500 KB) before it is read; its size is capped by the request's
+    max_content_length. Analysis options (expand_repeats, profile,
+    time_budget) are passed as query string arguments.
+    
+    Returns the same response as /analyze.
+    """
+    try:
+        if request.content_length is not None and request.content_length > request.max_content_length:
+            return jsonify({
+                "success": False,
+                "error": f"Upload exceeds the maximum size of {ANALYSIS_MAX_UPLOAD_BYTES} bytes"
+            }), 413
+        
+        options, error = _parse_analysis_options(request.args)
+        if error:
+            return jsonify({
+                "success": False,
+                "error": error
+            }), 400
+        
+        if request.mimetype == 'multipart/form-data':
+            upload = request.files.get('file')
+            if upload is None:
+                return jsonify({
+                    "success": False,
+                    "error": "Missing 'file' field in upload"
+                }), 400
+            stream = upload.stream
+        elif request.mimetype in ('text/plain', 'application/octet-stream'):
+            stream = request.stream
+        else:
+            return jsonify({
+                "success": False,
+                "error": "Expected a text/plain body or a multipart/form-data file upload"
+            }), 415
+        
+        lines = iter_stream_lines(stream, ANALYSIS_MAX_UPLOAD_BYTES)
+        analysis_result = nlp_processor.analyze_lines(lines, **options)
+        
+        if "error" in analysis_result:
+            return jsonify({
+                "success": False,
+                "error": analysis_result["error"]
+            }), 400
+        
+        return jsonify({
+            "success": True,
+            "data": analysis_result
+        })
+        
+    except UploadTooLarge as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 413
+    except HTTPException:
+        # Raised by werkzeug while parsing, e.g. 413 for a chunked multipart
+        # body above the limit, and answered by the error handlers
+        raise
+    except Exception as e:
+        logger.error(f"Error analyzing upload: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": "Internal server error occurred while analyzing lyrics"
+        }), 500
+
+def _corpus_disabled():
+    """Response for corpus endpoints when no corpus is configured"""
+    return jsonify({
+        "success": False,
+        "error": "Corpus store is not enabled, set CORPUS_DB_PATH"
+    }), 503
+
+def _limit_arg(default):
+    """Read the 'limit' query argument, bounded to 1..100"""
+    return max(1, min(request.args.get('limit', default, type=int), 100))
+
+@app.route('/corpus/songs', methods=['POST'])
+@limiter.limit("10 per minute")
+def corpus_add_song():
+    """
+    Analyze lyrics and store the result in the corpus
+    
+    Expected input:
+    {
+        "lyrics": "Hebrew rap lyrics text here",
+        "title": "Song title"  (optional)
+    }
+    
+    Returns:
+    {
+        "success": True,
+        "data": {"song_id": 1, "near_duplicates": [...]}
+    }
+    """
+    if corpus_store is None:
+        return _corpus_disabled()
+    
+    try:
+        data = request.get_json()
+        
+        if not data or not str(data.get('lyrics', '')).strip():
+            return jsonify({
+                "success": False,
+                "error": "Missing 'lyrics' field in request body"
+            }), 400
+        
+        lyrics = data['lyrics'].strip()
+        analysis_result = nlp_processor.analyze_lyrics(lyrics)
+        if "error" in analysis_result:
+            return jsonify({
+                "success": False,
+                "error": analysis_result["error"]
+            }), 400
+        
+        signature = minhasher.signature(phonetic_shingles(song_phonetics(analysis_result)))
+        song_id = corpus_store.save_analysis(
+            analysis_result,
+            lyrics_hash=make_key(nlp_processor.preprocess_text(lyrics)),
+            title=data.get('title'),
+            signature=signature.tobytes()
+        )
+        
+        return jsonify({
+            "success": True,
+            "data": {
+                "song_id": song_id,
+                "near_duplicates": _find_near_duplicates(signature, exclude=song_id)
+            }
+        })
+        
+    except Exception as e:
+        logger.error(f"Error storing song in corpus: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": "Internal server error occurred while storing the song"
+        }), 500
+
+@app.route('/corpus/near-duplicates', methods=['POST'])
+@limiter.limit("10 per minute")
+def corpus_near_duplicates():
+    """
+    Find corpus songs that are near-copies of the submitted lyrics
+    
+    Songs are compared by MinHash signatures over phonetic n-grams, so
+    remixes, covers and versions with typos are found through the LSH
+    index without comparing against every song.
+    
+    Expected input:
+    {
+        "lyrics": "Hebrew rap lyrics text here",
+        "threshold": 0.5,  (optional, estimated Jaccard similarity)
+        "limit": 10  (optional)
+    }
+    """
+    if corpus_store is None:
+        return _corpus_disabled()
+    
+    try:
+        data = request.get_json()
+        
+        if not data or not str(data.get('lyrics', '')).strip():
+            return jsonify({
+                "success": False,
+                "error": "Missing 'lyrics' field in request body"
+            }), 400
+        
+        threshold = float(data.get('threshold', 0.5))
+        if not math.isfinite(threshold):
+            raise ValueError
+        limit = max(1, min(int(data.get('limit', 10)), 100))
+        
+        # Only the transcriptions are needed, not a full analysis
+        phonetics = nlp_processor.transcribe_song(data['lyrics'].strip().split('\n'))
+        if not phonetics:
+            return jsonify({
+                "success": False,
+                "error": "No valid Hebrew text found in lyrics"
+            }), 400
+        
+        signature = minhasher.signature(phonetic_shingles(phonetics))
+        
+        return jsonify({
+            "success": True,
+            "data": {
+                "near_duplicates": _find_near_duplicates(signature, threshold, limit)
+            }
+        })
+        
+    except (TypeError, ValueError):
+        return jsonify({
+            "success": False,
+            "error": "'threshold' and 'limit' must be numbers"
+        }), 400
+    except Exception as e:
+        logger.error(f"Error finding near duplicates: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": "Internal server error occurred while finding near duplicates"
+        }), 500
+
+@app.route('/corpus/rhymes', methods=['GET'])
+def corpus_rhymes():
+    """
+    Songs using a rhyme ending
+    
+    Query arguments:
+        ending: Rhyme ending (final stressed vowel and coda), e.g. 'om'
+        word: Hebrew word to take the rhyme ending from, instead of ending
+        limit: Maximum number of songs (default 20)
+    """
+    if corpus_store is None:
+        return _corpus_disabled()
+    
+    ending = request.args.get('ending')
+    word = request.args.get('word')
+    if not ending and word:
+        ending = rhyme_ending(nlp_processor.get_phonetic_transcription(word))
+    if not ending:
+        return jsonify({
+            "success": False,
+            "error": "Expected an 'ending' or 'word' query argument"
+        }), 400
+    
+    return jsonify({
+        "success": True,
+        "data": {
+            "ending": ending,
+            "songs": corpus_store.songs_with_ending(ending, limit=_limit_arg(20))
+        }
+    })
+
+@app.route('/corpus/schemes', methods=['GET'])
+def corpus_schemes():
+    """
+    Most common 4-line rhyme schemes in the corpus
+    
+    Query arguments:
+        limit: Maximum number of schemes (default 10)
+    """
+    if corpus_store is None:
+        return _corpus_disabled()
+    
+    return jsonify({
+        "success": True,
+        "data": {
+            "schemes": corpus_store.common_schemes(limit=_limit_arg(10)),
+            "corpus": corpus_store.stats()
+        }
+    })
+
+@app.errorhandler(413)
+def request_too_large(error):
+    """Reject upload bodies above the request's max_content_length"""
+    return jsonify({
+        "success": False,
+        "error": f"Request body exceeds the maximum size of {ANALYSIS_MAX_UPLOAD_BYTES} bytes"
+    }), 413
+
 @app.route('/health', methods=['GET'])
 def health_check():
-    """Detailed health check"""
+    """Detailed health check based on the cached model self-test"""
     try:
-        # Test NLP processor
-        test_result = nlp_processor.test_connection()
+        self_test = nlp_processor.last_self_test or nlp_processor.self_test()
         
         return jsonify({
             "status": "healthy",
             "components": {
-                "nlp_processor": "ready" if test_result else "error"
-            }
+                "nlp_processor": self_test["status"]
+            },
+            "checked_at": self_test["checked_at"]
         })
     except Exception as e:
         return jsonify({
@@ -110,6 +574,28 @@ def health_check():
             "error": str(e)
         }), 500
 
+@app.route('/health/live', methods=['GET'])
+@limiter.exempt
+def liveness_check():
+    """Liveness probe, does no work beyond answering"""
+    return jsonify({"status": "alive"})
+
+@app.route('/health/ready', methods=['GET'])
+@limiter.exempt
+def readiness_check():
+    """Readiness probe, reports the cached self-test without running the model"""
+    self_test = nlp_processor.last_self_test
+    ready = self_test is not None and self_test["status"] != "error"
+    
+    return jsonify({
+        "status": "ready" if ready else "not_ready",
+        "warmed_up": nlp_processor.warmed_up,
+        "self_test": self_test,
+        "runtime": nlp_processor.runtime_config(),
+        "coalescing": analysis_flight.stats(),
+        "g2p_pool": nlp_processor.pool_stats()
+    }), 200 if ready else 503
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('FLASK_ENV') == 'development'
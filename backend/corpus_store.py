@@ -0,0 +1,259 @@
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from rhyme_scoring import rhyme_ending
+
+logger = logging.getLogger(__name__)
+
+# Lines per stanza used for the scheme statistics, incomplete trailing
+# stanzas are not counted
+STANZA_LINES = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS songs (
+    id INTEGER PRIMARY KEY,
+    title TEXT,
+    lyrics_hash TEXT NOT NULL UNIQUE,
+    rhyme_scheme TEXT NOT NULL,
+    total_lines INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS lines (
+    song_id INTEGER NOT NULL REFERENCES songs(id),
+    line_number INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    end_word TEXT,
+    end_phonetic TEXT,
+    rhyme_ending TEXT,
+    rhyme_group TEXT,
+    PRIMARY KEY (song_id, line_number)
+);
+CREATE TABLE IF NOT EXISTS rhyme_groups (
+    song_id INTEGER NOT NULL REFERENCES songs(id),
+    letter TEXT NOT NULL,
+    words TEXT NOT NULL,
+    PRIMARY KEY (song_id, letter)
+);
+CREATE TABLE IF NOT EXISTS stanza_schemes (
+    song_id INTEGER NOT NULL REFERENCES songs(id),
+    stanza INTEGER NOT NULL,
+    scheme TEXT NOT NULL,
+    PRIMARY KEY (song_id, stanza)
+);
+CREATE TABLE IF NOT EXISTS song_signatures (
+    song_id INTEGER PRIMARY KEY REFERENCES songs(id),
+    signature BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_lines_rhyme_ending ON lines (rhyme_ending, song_id);
+CREATE INDEX IF NOT EXISTS idx_songs_rhyme_scheme ON songs (rhyme_scheme);
+CREATE INDEX IF NOT EXISTS idx_stanza_schemes_scheme ON stanza_schemes (scheme, song_id);
+"""
+
+
+def normalize_scheme(scheme: str) -> str:
+    """
+    Re-letter a rhyme scheme by order of first appearance
+
+    Args:
+        scheme: Scheme such as 'CDCD' or 'B-B-'
+
+    Returns:
+        Normalized scheme such as 'ABAB' or 'A-A-'
+    """
+    letters = {}
+    normalized = []
+    for letter in scheme:
+        if letter == '-':
+            normalized.append(letter)
+            continue
+        if letter not in letters:
+            letters[letter] = chr(ord('A') + len(letters))
+        normalized.append(letters[letter])
+    return ''.join(normalized)
+
+
+class CorpusStore:
+    """
+    Local SQLite store of analyzed songs
+
+    Keeps each song's lines, end-word phonetics and rhyme groups, indexed by
+    rhyme ending and by stanza rhyme scheme so that catalogue statistics are
+    answered without re-running the analysis.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open (and create if needed) the corpus database
+
+        Args:
+            path: SQLite database file
+        """
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread, WAL lets workers read while one writes"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def save_analysis(self, analysis: Dict, lyrics_hash: str,
+                      title: Optional[str] = None,
+                      signature: Optional[bytes] = None) -> int:
+        """
+        Store the result of HebrewNLPProcessor.analyze_lyrics
+
+        Args:
+            analysis: Analysis result, repeated lines may be references
+            lyrics_hash: Identifies the lyrics, songs are stored once
+            title: Optional song title
+            signature: Optional serialized near-duplicate signature, stored
+                in the same transaction so that signatures become visible
+                in song ID order
+
+        Returns:
+            ID of the stored (or previously stored) song
+        """
+        lines = analysis["lines"]
+        rows = []
+        for line in lines:
+            source = lines[line["repeat_of"] - 1] if line.get("repeat_of") else line
+            end_word = source.get("end_word")
+            phonetic = end_word["phonetic"] if end_word else None
+            rows.append((
+                line["line_number"],
+                line["text"],
+                end_word["text"] if end_word else None,
+                phonetic,
+                rhyme_ending(phonetic) if phonetic else None,
+                line.get("rhyme_group")
+            ))
+
+        # The song scheme skips lines without a rhyming end word, stanzas are
+        # cut from the per-line groups so that they follow the line numbers
+        scheme = analysis["rhyme_scheme"]
+        line_groups = ''.join(line.get("rhyme_group") or '-' for line in lines)
+        stanzas = [normalize_scheme(line_groups[i:i + STANZA_LINES])
+                   for i in range(0, len(line_groups) - STANZA_LINES + 1, STANZA_LINES)]
+
+        conn = self._connection()
+        with self._write_lock, conn:
+            existing = conn.execute('SELECT id FROM songs WHERE lyrics_hash = ?',
+                                    (lyrics_hash,)).fetchone()
+            if existing:
+                return existing[0]
+
+            song_id = conn.execute(
+                'INSERT INTO songs (title, lyrics_hash, rhyme_scheme, total_lines, created_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (title, lyrics_hash, scheme, len(lines), time.time())
+            ).lastrowid
+            conn.executemany(
+                'INSERT INTO lines (song_id, line_number, text, end_word, end_phonetic, '
+                'rhyme_ending, rhyme_group) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(song_id,) + row for row in rows]
+            )
+            conn.executemany(
+                'INSERT INTO rhyme_groups (song_id, letter, words) VALUES (?, ?, ?)',
+                [(song_id, letter, ' '.join(words))
+                 for letter, words in analysis["rhyme_groups"].items()]
+            )
+            conn.executemany(
+                'INSERT INTO stanza_schemes (song_id, stanza, scheme) VALUES (?, ?, ?)',
+                [(song_id, idx, stanza) for idx, stanza in enumerate(stanzas)]
+            )
+            if signature is not None:
+                conn.execute('INSERT INTO song_signatures (song_id, signature) VALUES (?, ?)',
+                             (song_id, signature))
+        logger.info(f"Stored song {song_id} with {len(lines)} lines in the corpus")
+        return song_id
+
+    def songs_with_ending(self, ending: str, limit: int = 20) -> List[Dict]:
+        """
+        Find songs whose line-ending words use a rhyme ending
+
+        Args:
+            ending: Rhyme ending as returned by rhyme_scoring.rhyme_ending
+            limit: Maximum number of songs
+
+        Returns:
+            Songs ordered by how many lines end with the rhyme ending
+        """
+        rows = self._connection().execute(
+            'SELECT s.id, s.title, COUNT(*) AS line_count, GROUP_CONCAT(DISTINCT l.end_word) '
+            'FROM lines l JOIN songs s ON s.id = l.song_id '
+            'WHERE l.rhyme_ending = ? '
+            'GROUP BY l.song_id ORDER BY line_count DESC, s.id LIMIT ?',
+            (ending, limit)
+        ).fetchall()
+        return [
+            {
+                "song_id": song_id,
+                "title": title,
+                "lines": line_count,
+                "words": words.split(',') if words else []
+            } for song_id, title, line_count, words in rows
+        ]
+
+    def common_schemes(self, limit: int = 10) -> List[Dict]:
+        """
+        Most common stanza rhyme schemes across the corpus
+
+        Args:
+            limit: Maximum number of schemes
+
+        Returns:
+            Schemes with their stanza and song counts
+        """
+        rows = self._connection().execute(
+            'SELECT scheme, COUNT(*) AS stanzas, COUNT(DISTINCT song_id) '
+            'FROM stanza_schemes GROUP BY scheme ORDER BY stanzas DESC, scheme LIMIT ?',
+            (limit,)
+        ).fetchall()
+        return [
+            {"scheme": scheme, "stanzas": stanzas, "songs": songs}
+            for scheme, stanzas, songs in rows
+        ]
+
+    def iter_signatures(self, after_id: int = 0) -> Iterator[Tuple[int, bytes]]:
+        """
+        Yield stored near-duplicate signatures in song ID order
+
+        Args:
+            after_id: Only songs with a larger ID, for incremental loading
+
+        Yields:
+            Tuples of (song ID, serialized signature)
+        """
+        yield from self._connection().execute(
+            'SELECT song_id, signature FROM song_signatures WHERE song_id > ? ORDER BY song_id',
+            (after_id,)
+        )
+
+    def song_titles(self, song_ids: List[int]) -> Dict[int, Optional[str]]:
+        """Titles of the given songs"""
+        if not song_ids:
+            return {}
+        placeholders = ','.join('?' * len(song_ids))
+        rows = self._connection().execute(
+            f'SELECT id, title FROM songs WHERE id IN ({placeholders})', song_ids
+        ).fetchall()
+        return dict(rows)
+
+    def stats(self) -> Dict:
+        """Number of songs and lines in the corpus"""
+        conn = self._connection()
+        return {
+            "songs": conn.execute('SELECT COUNT(*) FROM songs').fetchone()[0],
+            "lines": conn.execute('SELECT COUNT(*) FROM lines').fetchone()[0]
+        }
@@ -0,0 +1,143 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from rhyme_scoring import (GAP, MAX_CODA, NO_VOWEL, PHONEME_INDEX, VOWEL_FEATURES,
+                           rhyme_tail, tokenize_phonetic)
+
+# Bars on either side of a word searched for a rhyming word
+RHYME_WINDOW_BARS = 1
+
+# Base used to pack a rhyme tail (vowel and padded coda) into one integer
+_KEY_BASE = GAP + 1
+
+# Lookup table marking vowel indices in tokenized transcriptions
+_IS_VOWEL = np.zeros(_KEY_BASE, dtype=bool)
+_IS_VOWEL[[PHONEME_INDEX[vowel] for vowel in VOWEL_FEATURES]] = True
+
+
+def _word_features(phonetics: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Syllable counts and rhyme keys of distinct transcriptions
+
+    Tokenization and rhyme tails come from the cached helpers of
+    rhyme_scoring, vowels are counted over all tokens at once.
+
+    Args:
+        phonetics: Distinct phonetic transcriptions
+
+    Returns:
+        Tuple of (syllable counts, rhyme keys with -1 for words without a vowel)
+    """
+    tokens = [tokenize_phonetic(phonetic)[0] for phonetic in phonetics]
+    lengths = np.fromiter((len(indices) for indices in tokens), dtype=np.intp, count=len(tokens))
+    flat = np.fromiter((idx for indices in tokens for idx in indices), dtype=np.intp,
+                       count=int(lengths.sum()))
+    owner = np.repeat(np.arange(len(tokens)), lengths)
+    syllables = np.bincount(owner, weights=_IS_VOWEL[flat], minlength=len(tokens))
+    # Every word is at least one syllable, even when transcribed without vowels
+    syllables = np.maximum(syllables, 1).astype(np.int64)
+
+    tails = np.array([(vowel,) + coda for vowel, coda in map(rhyme_tail, phonetics)],
+                     dtype=np.int64).reshape(-1, MAX_CODA + 1)
+    keys = tails @ (_KEY_BASE ** np.arange(MAX_CODA, -1, -1, dtype=np.int64))
+    keys[tails[:, 0] == NO_VOWEL] = -1
+    return syllables, keys
+
+
+def _count_in_window(values: np.ndarray, window: int) -> np.ndarray:
+    """Number of values within +-window of each value, itself included"""
+    ordered = np.sort(values)
+    return (np.searchsorted(ordered, values + window, side='right') -
+            np.searchsorted(ordered, values - window, side='left'))
+
+
+def compute_flow_metrics(bars: List[List[Optional[str]]],
+                         estimated: Optional[List[List[bool]]] = None,
+                         window: int = RHYME_WINDOW_BARS) -> Tuple[List[Dict], Dict]:
+    """
+    Compute per-bar syllable counts, rhyme density and rhyme positions
+
+    A bar is one lyrics line. A word rhymes when a word with a different
+    transcription within window bars shares its final stressed vowel and
+    coda, so internal and multi-word rhymes are counted as well as line
+    endings, while a word repeated next to itself is not. Apart from
+    tokenizing each distinct transcription once, the whole song is handled
+    in a single pass of array operations.
+
+    Args:
+        bars: Transcription of every word per line, None for words that were
+            not transcribed (stop words), which count as one syllable and
+            never rhyme
+        estimated: Flags aligned with bars marking rule-based transcriptions
+            whose vowels are guesses. Bars containing such words get no
+            syllable count and are left out of the syllable statistics.
+        window: Bars on either side searched for rhyming words
+
+    Returns:
+        Tuple of (per-bar metrics, song statistics)
+    """
+    line_count = len(bars)
+    lengths = np.fromiter((len(bar) for bar in bars), dtype=np.intp, count=line_count)
+    flat = np.array([phonetic or '' for bar in bars for phonetic in bar], dtype=str)
+    word_count = len(flat)
+    if estimated is None:
+        guessed = np.zeros(word_count, dtype=bool)
+    else:
+        guessed = np.fromiter((flag for flags in estimated for flag in flags), dtype=bool,
+                              count=word_count)
+
+    # Distinct transcriptions are tokenized once, '' marks untranscribed words
+    distinct, word_ids = np.unique(flat, return_inverse=True)
+    word_ids = word_ids.reshape(-1)
+    syllable_table, key_table = _word_features(distinct.tolist())
+    transcribed = distinct != ''
+    syllables = np.where(transcribed, syllable_table, 1)[word_ids]
+    keys = np.where(transcribed, key_table, -1)[word_ids]
+
+    word_line = np.repeat(np.arange(line_count), lengths)
+    line_starts = np.cumsum(lengths) - lengths
+    positions = np.arange(word_count) - line_starts[word_line]
+
+    # A word rhymes when the words sharing its key within the window
+    # outnumber those sharing its transcription. Both are counted by binary
+    # search over (group, bar) values, the stride keeps groups apart.
+    candidates = np.flatnonzero(keys >= 0)
+    stride = line_count + window + 1
+    lines = word_line[candidates]
+    rhyme_words = _count_in_window(keys[candidates] * stride + lines, window)
+    same_words = _count_in_window(word_ids[candidates] * stride + lines, window)
+    rhymes = np.zeros(word_count, dtype=bool)
+    rhymes[candidates[rhyme_words > same_words]] = True
+
+    bar_syllables = np.bincount(word_line, weights=syllables, minlength=line_count).astype(np.int64)
+    bar_guessed = np.bincount(word_line, weights=guessed, minlength=line_count) > 0
+    bar_rhymes = np.bincount(word_line, weights=rhymes, minlength=line_count).astype(np.int64)
+    bar_density = np.round(bar_rhymes / np.maximum(lengths, 1), 3)
+    is_line_end = positions == lengths[word_line] - 1
+
+    rhyme_positions = positions[rhymes].tolist()
+    rhyme_ends = np.cumsum(bar_rhymes).tolist()
+    bar_metrics = [
+        {
+            "syllables": None if syllables_guessed else syllable_count,
+            "rhyme_density": density,
+            "rhyme_positions": rhyme_positions[end - count:end]
+        } for syllable_count, syllables_guessed, density, count, end in zip(
+            bar_syllables.tolist(), bar_guessed.tolist(), bar_density.tolist(),
+            bar_rhymes.tolist(), rhyme_ends)
+    ]
+
+    measured = (lengths > 0) & ~bar_guessed
+    statistics = {
+        "total_syllables": int(bar_syllables[measured].sum()) if measured.any() else None,
+        "syllables_per_bar": round(float(bar_syllables[measured].mean()), 2)
+        if measured.any() else None,
+        "syllables_per_bar_std": round(float(bar_syllables[measured].std()), 2)
+        if measured.any() else None,
+        "measured_bars": int(measured.sum()),
+        "estimated_words": int(guessed.sum()),
+        "rhyme_density": round(float(rhymes.mean()), 3) if word_count else 0.0,
+        "internal_rhymes": int((rhymes & ~is_line_end).sum())
+    }
+    return bar_metrics, statistics
@@ -1,9 +1,19 @@
 import re
+import os
+import time
+import threading
+import multiprocessing
 import logging
-from typing import List, Dict, Tuple, Set
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait
+from typing import List, Dict, Tuple, Set, Optional, Iterable, Iterator
 from collections import defaultdict, Counter
 import nltk
 from nltk.tokenize import word_tokenize
+from rhyme_scoring import RhymeScorer, RHYME_THRESHOLD
+from niqqud import has_sufficient_niqqud, strip_cantillation, strip_niqqud, transliterate
+from model_pool import ModelPool
+from transcription_cache import TranscriptionCache
+from flow_metrics import compute_flow_metrics
 
 # Try to import phonikud, fall back to basic Hebrew processing if not available
 try:
@@ -14,6 +24,14 @@ except ImportError:
     PHONIKUD_AVAILABLE = False
     PhonemeG2P = None
 
+# ONNX Runtime is optional, it is only needed to tune the G2P inference session
+try:
+    import onnxruntime
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+    onnxruntime = None
+
 # Download required NLTK data
 try:
     nltk.data.find('tokenizers/punkt')
@@ -22,46 +40,289 @@ except LookupError:
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of word transcriptions kept in the per-processor cache
+PHONETIC_CACHE_SIZE = 20000
+
+# Representative words used to prime the model and caches at startup
+WARMUP_WORDS = [
+    'שלום', 'אני', 'רוצה', 'להגיד', 'עכשיו', 'שמיים', 'תמיד', 'הולדת',
+    'בנובמבר', 'בכספת', 'הקצפת', 'חביתה', 'אהבה', 'לילה', 'רחוב', 'כסף',
+    'חלום', 'מילים', 'שירים', 'בלב', 'אותך', 'איתי', 'עולם', 'זמן'
+]
+
+# Analysis profiles trading depth for speed
+# model: transcribe every word with the G2P model (otherwise rule-based
+#        transcription only)
+# flow_metrics: add per-bar syllable and rhyme density metrics
+ANALYSIS_PROFILES = {
+    'fast': {"model": False, "flow_metrics": False},
+    'full': {"model": True, "flow_metrics": True}
+}
+
+# Degraded words listed in the analysis block, the rest are only counted
+DEGRADED_SAMPLE_SIZE = 20
+
+# Parallel transcription modes for long lyrics
+PARALLEL_MODES = ('off', 'thread', 'process')
+
+# Seconds to wait past the deadline for transcription chunks to finish the
+# model call they are in before falling back for the whole chunk
+DEADLINE_GRACE = 1.0
+
+# Start method of transcription worker processes. Forking a process that
+# runs request threads and ONNX Runtime sessions can copy held locks into
+# the child, forkserver (spawn where unavailable) starts clean workers.
+WORKER_START_METHOD = ('forkserver' if 'forkserver' in multiprocessing.get_all_start_methods()
+                       else 'spawn')
+
+# Processor used by transcription worker processes, created by _init_worker
+_worker_processor = None
+
+def _init_worker(processor_kwargs: Dict):
+    """Create the processor of a transcription worker process"""
+    global _worker_processor
+    _worker_processor = HebrewNLPProcessor(**processor_kwargs)
+
+def _transcribe_in_worker(words: List[str],
+                          deadline: Optional[float]) -> Tuple[List[str], List[bool], List[str]]:
+    """Transcribe a chunk of words in a worker process"""
+    return _worker_processor.transcribe_until(words, deadline)
+
+# Accepted names for the session execution mode and graph optimization level
+EXECUTION_MODES = ('sequential', 'parallel')
+GRAPH_OPTIMIZATION_LEVELS = ('disable', 'basic', 'extended', 'all')
+
 class HebrewNLPProcessor:
     """
     Hebrew NLP processor for rap lyrics analysis
     Handles tokenization, phonetic transcription, and rhyme detection
+    
+    A processor is safe to share between request threads: G2P inference goes
+    through a pool of model instances, every other piece of state is either
+    read-only or guarded by a lock.
     """
     
-    def __init__(self):
-        """Initialize the Hebrew NLP processor"""
+    def __init__(self, intra_op_threads: Optional[int] = None,
+                 inter_op_threads: Optional[int] = None,
+                 execution_mode: Optional[str] = None,
+                 graph_optimization: Optional[str] = None,
+                 parallel_mode: str = 'off',
+                 parallel_workers: Optional[int] = None,
+                 parallel_threshold: int = 500,
+                 g2p_pool_size: int = 1):
+        """
+        Initialize the Hebrew NLP processor
+        
+        Args:
+            intra_op_threads: Threads used inside a single G2P operator,
+                None keeps the runtime default (all cores)
+            inter_op_threads: Threads used to run independent operators
+            execution_mode: 'sequential' or 'parallel' operator execution
+            graph_optimization: 'disable', 'basic', 'extended' or 'all'
+            parallel_mode: 'off', 'thread' (when the G2P runtime releases
+                the GIL) or 'process' to transcribe long lyrics in parallel
+            parallel_workers: Size of the transcription pool, defaults to
+                the number of cores
+            parallel_threshold: Minimum number of unique words in a song
+                before transcription is parallelized
+            g2p_pool_size: Number of G2P model instances, each used by one
+                thread at a time, so that threaded workers can run several
+                analyses concurrently. In 'thread' parallel mode it is raised
+                to at least parallel_workers, otherwise the transcription
+                threads would queue for a single instance
+        """
+        if execution_mode is not None and execution_mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode: {execution_mode}")
+        if graph_optimization is not None and graph_optimization not in GRAPH_OPTIMIZATION_LEVELS:
+            raise ValueError(f"Unknown graph optimization level: {graph_optimization}")
+        if parallel_mode not in PARALLEL_MODES:
+            raise ValueError(f"Unknown parallel mode: {parallel_mode}")
+        
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.execution_mode = execution_mode
+        self.graph_optimization = graph_optimization
+        self.session_options_applied = False
+        
+        self.parallel_mode = parallel_mode
+        self.parallel_workers = parallel_workers or os.cpu_count() or 1
+        self.parallel_threshold = parallel_threshold
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        
+        if parallel_mode == 'thread' and g2p_pool_size < self.parallel_workers:
+            logger.warning(f"G2P pool size {g2p_pool_size} is below the {self.parallel_workers} "
+                           f"transcription threads, raising it to {self.parallel_workers}")
+            g2p_pool_size = self.parallel_workers
+        
         if PHONIKUD_AVAILABLE:
             try:
-                self.g2p = PhonemeG2P()
-                logger.info("Hebrew G2P model loaded successfully")
+                self.g2p_pool = ModelPool(self._load_g2p, size=g2p_pool_size)
+                logger.info(f"Hebrew G2P model loaded successfully ({g2p_pool_size} instances)")
             except Exception as e:
                 logger.error(f"Failed to load G2P model: {e}")
-                self.g2p = None
+                self.g2p_pool = None
         else:
             logger.warning("Phonikud not available, using fallback Hebrew processing")
-            self.g2p = None
+            self.g2p_pool = None
         
         # Hebrew text preprocessing patterns
-        self.hebrew_pattern = re.compile(r'[א-ת]+')
+        # Words keep their niqqud so vocalized input can skip the G2P model
+        self.hebrew_pattern = re.compile(r'[א-ת][א-ת\u05B0-\u05BD\u05BF\u05C1\u05C2\u05C7]*')
         self.punctuation_pattern = re.compile(r'[^\w\s]', re.UNICODE)
+        self.line_punctuation_pattern = re.compile(r'[.,!?׃]')
         
         # Reduced stop words list - keep more words for better rhyme detection in rap
         self.stop_words = {
             'את', 'של', 'על', 'אל', 'לא', 'או', 'גם', 'כי', 'אם', 'עם'
         }
+        
+        self.rhyme_scorer = RhymeScorer()
+        
+        # Words repeat heavily across lines and songs, cache their transcriptions
+        self.transcription_cache = TranscriptionCache(PHONETIC_CACHE_SIZE)
+        
+        # Result of the last self-test, refreshed by self_test()
+        self.last_self_test = None
+        self.warmed_up = False
+    
+    def _build_session_options(self):
+        """
+        Build ONNX Runtime session options from the processor settings
+        
+        Returns:
+            SessionOptions, or None when nothing is configured or ONNX
+            Runtime is not installed
+        """
+        configured = (self.intra_op_threads, self.inter_op_threads,
+                      self.execution_mode, self.graph_optimization)
+        if all(option is None for option in configured):
+            return None
+        if not ONNXRUNTIME_AVAILABLE:
+            logger.warning("onnxruntime not available, G2P session settings are ignored")
+            return None
+        
+        options = onnxruntime.SessionOptions()
+        if self.intra_op_threads is not None:
+            options.intra_op_num_threads = self.intra_op_threads
+        if self.inter_op_threads is not None:
+            options.inter_op_num_threads = self.inter_op_threads
+        if self.execution_mode is not None:
+            options.execution_mode = {
+                'sequential': onnxruntime.ExecutionMode.ORT_SEQUENTIAL,
+                'parallel': onnxruntime.ExecutionMode.ORT_PARALLEL
+            }[self.execution_mode]
+        if self.graph_optimization is not None:
+            options.graph_optimization_level = {
+                'disable': onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL,
+                'basic': onnxruntime.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+                'extended': onnxruntime.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+                'all': onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+            }[self.graph_optimization]
+        return options
+    
+    def _load_g2p(self):
+        """
+        Create the G2P model with the configured inference session
+        
+        The session is created once here and reused for every request
+        handled by this processor.
+        
+        Returns:
+            PhonemeG2P instance
+        """
+        session_options = self._build_session_options()
+        if session_options is not None:
+            try:
+                g2p = PhonemeG2P(session_options=session_options)
+                self.session_options_applied = True
+                return g2p
+            except TypeError:
+                logger.warning("PhonemeG2P does not accept session options, using defaults")
+        return PhonemeG2P()
+    
+    def pool_stats(self) -> Optional[Dict]:
+        """Usage and wait-time metrics of the G2P model pool"""
+        return self.g2p_pool.stats() if self.g2p_pool else None
+    
+    def runtime_config(self) -> Dict:
+        """
+        Report the effective G2P inference configuration
+        
+        Returns:
+            Dictionary with the backend, thread settings and host core count
+        """
+        return {
+            "g2p_backend": "phonikud" if self.g2p_pool else "fallback",
+            "g2p_pool_size": self.g2p_pool.size if self.g2p_pool else 0,
+            "onnxruntime_available": ONNXRUNTIME_AVAILABLE,
+            "session_options_applied": self.session_options_applied,
+            "intra_op_threads": self.intra_op_threads,
+            "inter_op_threads": self.inter_op_threads,
+            "execution_mode": self.execution_mode,
+            "graph_optimization": self.graph_optimization,
+            "parallel_mode": self.parallel_mode,
+            "parallel_workers": self.parallel_workers,
+            "parallel_threshold": self.parallel_threshold,
+            "cpu_count": os.cpu_count()
+        }
     
     def test_connection(self) -> bool:
         """Test if the processor is working correctly"""
         try:
             test_word = "שלום"
-            if self.g2p:
-                phonemes = self.g2p(test_word)
+            if self.g2p_pool:
+                with self.g2p_pool.checkout() as g2p:
+                    phonemes = g2p(test_word)
                 return len(phonemes) > 0
             return False
         except Exception as e:
             logger.error(f"Test connection failed: {e}")
             return False
     
+    def self_test(self) -> Dict:
+        """
+        Run the model self-test and cache its result
+        
+        Returns:
+            Self-test result with status, mode and timing information
+        """
+        start = time.perf_counter()
+        model_ok = self.test_connection()
+        duration_ms = (time.perf_counter() - start) * 1000
+        
+        if self.g2p_pool is None:
+            status = "fallback"
+        else:
+            status = "ready" if model_ok else "error"
+        
+        self.last_self_test = {
+            "status": status,
+            "checked_at": time.time(),
+            "duration_ms": round(duration_ms, 2)
+        }
+        return self.last_self_test
+    
+    def warmup(self, words: Optional[List[str]] = None) -> float:
+        """
+        Prime the G2P model and transcription cache with representative words
+        
+        Args:
+            words: Words to transcribe, defaults to WARMUP_WORDS
+            
+        Returns:
+            Warmup duration in seconds
+        """
+        start = time.perf_counter()
+        for word in words or WARMUP_WORDS:
+            self.get_phonetic_transcription(word)
+        self.self_test()
+        self.warmed_up = True
+        
+        elapsed = time.perf_counter() - start
+        logger.info(f"Warmup finished in {elapsed:.2f}s")
+        return elapsed
+    
     def preprocess_text(self, text: str) -> str:
         """
         Preprocess Hebrew text for analysis
@@ -72,13 +333,22 @@ class HebrewNLPProcessor:
         Returns:
             Cleaned and normalized text
         """
-        # Split into lines first
-        lines = text.split('\n')
-        cleaned_lines = []
+        return '\n'.join(self.iter_clean_lines(text.split('\n')))
+    
+    def iter_clean_lines(self, lines: Iterable[str]) -> Iterator[str]:
+        """
+        Clean raw lyrics lines one at a time
         
+        Args:
+            lines: Raw lines, e.g. a generator reading an upload stream
+            
+        Yields:
+            Cleaned lines that contain Hebrew text
+        """
         for line in lines:
-            # Remove tabs and excessive whitespace at start/end
-            line = line.strip()
+            # Remove tabs and excessive whitespace at start/end, and
+            # cantillation marks that would split vocalized words
+            line = strip_cantillation(line.strip())
             
             # Skip empty lines
             if not line:
@@ -91,11 +361,75 @@ class HebrewNLPProcessor:
             # Clean up multiple spaces
             cleaned_line = re.sub(r'\s+', ' ', cleaned_line).strip()
             
-            # Only add non-empty lines with Hebrew content
+            # Only keep non-empty lines with Hebrew content
             if cleaned_line and re.search(r'[\u0590-\u05FF]', cleaned_line):
-                cleaned_lines.append(cleaned_line)
+                yield cleaned_line
+    
+    def normalize_line(self, line: str) -> str:
+        """
+        Normalize a lyrics line for repeat detection
+        
+        Args:
+            line: Preprocessed lyrics line
+            
+        Returns:
+            Line without punctuation and with collapsed whitespace
+        """
+        return ' '.join(self.line_punctuation_pattern.sub(' ', line).split())
+    
+    def find_repeated_lines(self, lines: List[str]) -> List[Optional[int]]:
+        """
+        Map every line to the index of its first identical occurrence
         
-        return '\n'.join(cleaned_lines)
+        Args:
+            lines: Preprocessed lyrics lines
+            
+        Returns:
+            List with the first occurrence index for repeated lines, None otherwise
+        """
+        first_seen = {}
+        repeat_of = []
+        for line_idx, line in enumerate(lines):
+            key = self.normalize_line(line)
+            if key in first_seen:
+                repeat_of.append(first_seen[key])
+            else:
+                first_seen[key] = line_idx
+                repeat_of.append(None)
+        return repeat_of
+    
+    def find_repeated_sections(self, repeat_of: List[Optional[int]]) -> List[Dict]:
+        """
+        Group consecutive repeated lines into repeated multi-line blocks
+        
+        Args:
+            repeat_of: Output of find_repeated_lines
+            
+        Returns:
+            List of sections with 1-based start/end line numbers and the
+            line number where the original block starts
+        """
+        sections = []
+        line_idx = 0
+        while line_idx < len(repeat_of):
+            source_idx = repeat_of[line_idx]
+            if source_idx is None:
+                line_idx += 1
+                continue
+            
+            length = 1
+            while (line_idx + length < len(repeat_of) and
+                   repeat_of[line_idx + length] == source_idx + length):
+                length += 1
+            
+            if length > 1:
+                sections.append({
+                    "start_line": line_idx + 1,
+                    "end_line": line_idx + length,
+                    "repeat_of": source_idx + 1
+                })
+            line_idx += length
+        return sections
     
     def extract_hebrew_words(self, text: str) -> List[str]:
         """
@@ -105,7 +439,7 @@ class HebrewNLPProcessor:
             text: Hebrew text
             
         Returns:
-            List of Hebrew words
+            List of Hebrew words, vocalized words keep their niqqud
         """
         words = []
         for word in text.split():
@@ -115,10 +449,14 @@ class HebrewNLPProcessor:
                 hebrew_match = self.hebrew_pattern.search(word)
                 if hebrew_match:
                     hebrew_word = hebrew_match.group()
-                    if len(hebrew_word) > 1:  # Ignore single character words
+                    if len(strip_niqqud(hebrew_word)) > 1:  # Ignore single character words
                         words.append(hebrew_word)
         return words
     
+    def is_stop_word(self, word: str) -> bool:
+        """Check if a word, with or without niqqud, is a stop word"""
+        return strip_niqqud(word) in self.stop_words
+    
     def get_phonetic_transcription(self, word: str) -> str:
         """
         Get phonetic transcription of a Hebrew word
@@ -129,18 +467,222 @@ class HebrewNLPProcessor:
         Returns:
             Phonetic transcription
         """
-        if not self.g2p:
-            # Fallback: use simplified Hebrew phonetic approximation
-            return self._simple_hebrew_phonetic(word)
+        return self._transcription(word)[0]
+    
+    def _transcription(self, word: str) -> Tuple[str, bool]:
+        """Cached transcription of a word and whether it was letter-mapped"""
+        result = self.transcription_cache.get(word)
+        if result is None:
+            result = self._transcribe(word)
+            self.transcription_cache.put(word, result)
+        return result
+    
+    def _uses_model(self, word: str) -> bool:
+        """Check whether a word is transcribed by the G2P model rather than by rules"""
+        return self.g2p_pool is not None and not has_sufficient_niqqud(word)
+    
+    def _transcribe_late(self, word: str) -> Tuple[str, bool, bool]:
+        """
+        Transcribe a word after the deadline without calling the G2P model
+        
+        Args:
+            word: Hebrew word
+            
+        Returns:
+            Tuple of (cached or rule-based transcription, whether it was
+            letter-mapped, whether it differs from what the model path
+            would have returned)
+        """
+        cached = self.transcription_cache.peek(word)
+        if cached is not None:
+            return cached + (False,)
+        return self._fallback(word) + (self._uses_model(word),)
+    
+    def _transcribe(self, word: str) -> Tuple[str, bool]:
+        """
+        Transcribe a Hebrew word without caching
+        
+        Words with enough niqqud are transliterated by rules, other words
+        go through the G2P model without their partial niqqud.
+        
+        Args:
+            word: Hebrew word
+            
+        Returns:
+            Tuple of (phonetic transcription, whether it was letter-mapped
+            because neither the model nor the niqqud rules applied)
+        """
+        if has_sufficient_niqqud(word) or not self.g2p_pool:
+            # Fallback: use rule-based Hebrew phonetic approximation
+            return self._fallback(word)
+        word = strip_niqqud(word)
         
         try:
-            phonemes = self.g2p(word)
+            with self.g2p_pool.checkout() as g2p:
+                phonemes = g2p(word)
             if phonemes:
-                return ' '.join(phonemes)
-            return self._simple_hebrew_phonetic(word)
+                return ' '.join(phonemes), False
+            return self._simple_hebrew_phonetic(word), True
         except Exception as e:
             logger.warning(f"Failed to get phonetic transcription for '{word}': {e}")
-            return self._simple_hebrew_phonetic(word)
+            return self._simple_hebrew_phonetic(word), True
+    
+    def _get_executor(self):
+        """Create the transcription pool on first use and reuse it afterwards"""
+        with self._executor_lock:
+            if self._executor is None:
+                if self.parallel_mode == 'process':
+                    processor_kwargs = {
+                        "intra_op_threads": self.intra_op_threads,
+                        "inter_op_threads": self.inter_op_threads,
+                        "execution_mode": self.execution_mode,
+                        "graph_optimization": self.graph_optimization
+                    }
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.parallel_workers,
+                        mp_context=multiprocessing.get_context(WORKER_START_METHOD),
+                        initializer=_init_worker,
+                        initargs=(processor_kwargs,)
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.parallel_workers,
+                        thread_name_prefix="transcribe"
+                    )
+            return self._executor
+    
+    def transcribe_until(self, words: List[str],
+                         deadline: Optional[float]) -> Tuple[List[str], List[bool], List[str]]:
+        """
+        Transcribe words with the G2P model until the deadline passes
+        
+        The deadline is checked before every word, words reached after it
+        use their cached transcription or get the rule-based one.
+        time.monotonic() is system-wide, so worker processes can compare
+        against the caller's deadline.
+        
+        Args:
+            words: Hebrew words
+            deadline: time.monotonic() value, None for no limit
+            
+        Returns:
+            Tuple of (transcriptions aligned with words, letter-mapped flags
+            aligned with words, words whose transcription changed because
+            they fell back)
+        """
+        transcriptions = []
+        letter_mapped = []
+        degraded = []
+        for word in words:
+            if deadline is not None and time.monotonic() >= deadline:
+                phonetic, estimated, changed = self._transcribe_late(word)
+                if changed:
+                    degraded.append(word)
+            else:
+                phonetic, estimated = self._transcription(word)
+            transcriptions.append(phonetic)
+            letter_mapped.append(estimated)
+        return transcriptions, letter_mapped, degraded
+    
+    def transcribe_words(self, words: List[str],
+                         deadline: Optional[float] = None) -> Tuple[Dict[str, str], Set[str], List[str]]:
+        """
+        Transcribe a list of unique words, in parallel for large inputs
+        
+        Args:
+            words: Unique Hebrew words
+            deadline: time.monotonic() value after which remaining words get
+                the rule-based transcription instead of the G2P model
+            
+        Returns:
+            Tuple of (dictionary mapping each word to its phonetic
+            transcription, words whose transcription is letter-mapped and
+            has guessed vowels, words whose transcription changed because
+            they fell back at the deadline)
+        """
+        if self.parallel_mode == 'off' or len(words) < self.parallel_threshold:
+            results, letter_mapped, degraded = self.transcribe_until(words, deadline)
+            return (dict(zip(words, results)),
+                    {word for word, estimated in zip(words, letter_mapped) if estimated}, degraded)
+        
+        transcriptions = {}
+        estimated_words = set()
+        degraded = []
+        
+        # Contiguous chunks keep the merge deterministic and limit IPC overhead
+        chunk_size = -(-len(words) // (self.parallel_workers * 4))
+        chunks = [words[i:i + chunk_size] for i in range(0, len(words), chunk_size)]
+        
+        executor = self._get_executor()
+        task = _transcribe_in_worker if self.parallel_mode == 'process' else self.transcribe_until
+        futures = [executor.submit(task, chunk, deadline) for chunk in chunks]
+        # Chunks switch to the fallback themselves at the deadline, the grace
+        # period only covers model calls already in progress
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic()) + DEADLINE_GRACE
+        done, _ = wait(futures, timeout=timeout)
+        
+        for chunk, future in zip(chunks, futures):
+            if future in done and future.exception() is None:
+                results, letter_mapped, chunk_degraded = future.result()
+                transcriptions.update(zip(chunk, results))
+                estimated_words.update(word for word, estimated in zip(chunk, letter_mapped) if estimated)
+                degraded.extend(chunk_degraded)
+                continue
+            if future in done:
+                logger.warning(f"Parallel transcription failed: {future.exception()}")
+            future.cancel()
+            for word in chunk:
+                transcriptions[word], estimated, changed = self._transcribe_late(word)
+                if estimated:
+                    estimated_words.add(word)
+                if changed:
+                    degraded.append(word)
+        return transcriptions, estimated_words, degraded
+    
+    def transcribe_song(self, raw_lines: Iterable[str],
+                        deadline: Optional[float] = None) -> List[str]:
+        """
+        Transcribe the words of lyrics in line order, without analyzing them
+        
+        Stop words are skipped, repeated lines are included, so the result
+        matches near_duplicates.song_phonetics of the full analysis.
+        
+        Args:
+            raw_lines: Raw Hebrew rap lyrics lines
+            deadline: time.monotonic() value, see transcribe_words
+            
+        Returns:
+            Phonetic transcriptions of all transcribed words
+        """
+        words = [word for line in self.iter_clean_lines(raw_lines)
+                 for word in self.extract_hebrew_words(line) if not self.is_stop_word(word)]
+        transcriptions, _, _ = self.transcribe_words(list(dict.fromkeys(words)), deadline)
+        return [transcriptions[word] for word in words if transcriptions[word]]
+    
+    def close(self):
+        """Shut down the transcription pool, if one was started"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+    
+    def fallback_transcription(self, word: str) -> str:
+        """
+        Rule-based transcription that never calls the G2P model
+        
+        Args:
+            word: Hebrew word, possibly vocalized
+            
+        Returns:
+            Phonetic transcription
+        """
+        return self._fallback(word)[0]
+    
+    def _fallback(self, word: str) -> Tuple[str, bool]:
+        """Rule-based transcription of a word and whether it was letter-mapped"""
+        if has_sufficient_niqqud(word):
+            return transliterate(word), False
+        return self._simple_hebrew_phonetic(strip_niqqud(word)), True
     
     def _simple_hebrew_phonetic(self, word: str) -> str:
         """
@@ -180,7 +722,8 @@ class HebrewNLPProcessor:
     
     def calculate_phonetic_similarity(self, word1_phonetic: str, word2_phonetic: str) -> float:
         """
-        Calculate phonetic similarity between two words with improved Hebrew rhyme detection
+        Calculate phonetic similarity between two words based on their
+        final stressed vowel and coda
         
         Args:
             word1_phonetic: Phonetic transcription of first word
@@ -189,48 +732,7 @@ class HebrewNLPProcessor:
         Returns:
             Similarity score (0.0 - 1.0)
         """
-        if word1_phonetic == word2_phonetic:
-            return 1.0
-        
-        # For our simplified phonetic system, treat as character strings
-        if not word1_phonetic or not word2_phonetic:
-            return 0.0
-        
-        # Direct suffix comparison for better rhyme detection
-        min_len = min(len(word1_phonetic), len(word2_phonetic))
-        
-        # Count matching characters from the end
-        suffix_matches = 0
-        for i in range(1, min_len + 1):
-            if word1_phonetic[-i] == word2_phonetic[-i]:
-                suffix_matches += 1
-            else:
-                break
-        
-        # Calculate similarity - be more generous with Hebrew rhymes
-        if suffix_matches >= 2:  # At least 2 matching ending characters
-            suffix_ratio = suffix_matches / min_len
-            return min(1.0, suffix_ratio * 1.2)  # Boost rhyme scores
-        elif suffix_matches == 1 and min_len <= 3:  # Short words, 1 match is okay
-            return 0.6
-        
-        # Check for partial matches (less strict)
-        if word1_phonetic[-1] == word2_phonetic[-1]:  # Same ending sound
-            return 0.5
-        
-        # Special Hebrew rhyming patterns
-        # Check for common Hebrew endings that often rhyme
-        common_endings = [
-            ('et', 'at'), ('im', 'am'), ('ot', 'ut'), 
-            ('tz', 'z'), ('ch', 'k'), ('sh', 's')
-        ]
-        
-        for end1, end2 in common_endings:
-            if (word1_phonetic.endswith(end1) and word2_phonetic.endswith(end2)) or \
-               (word1_phonetic.endswith(end2) and word2_phonetic.endswith(end1)):
-                return 0.5
-        
-        return 0.0
+        return self.rhyme_scorer.score(word1_phonetic, word2_phonetic)
     
     def detect_rhymes(self, words_with_phonetics: List[Tuple[str, str]]) -> Dict[str, int]:
         """
@@ -247,73 +749,161 @@ class HebrewNLPProcessor:
         
         rhyme_groups = {}
         rhyme_group_id = 0
-        similarity_threshold = 0.4  # Lower threshold for Hebrew rhymes
         
         for i, (word1, phonetic1) in enumerate(words_with_phonetics):
             if word1 in rhyme_groups:
                 continue
-                
-            # Start a new rhyme group
-            current_group = rhyme_group_id
-            rhyme_groups[word1] = current_group
-            group_has_members = False
-            
-            # Find other words that rhyme with this one
-            for j, (word2, phonetic2) in enumerate(words_with_phonetics[i + 1:], i + 1):
-                if word2 in rhyme_groups:
-                    continue
-                    
-                similarity = self.calculate_phonetic_similarity(phonetic1, phonetic2)
-                if similarity >= similarity_threshold:
-                    rhyme_groups[word2] = current_group
-                    group_has_members = True
             
-            # Only increment group ID if this group has multiple members
-            if group_has_members:
+            # Candidates are the following words that are not grouped yet
+            candidates = [(word2, phonetic2) for word2, phonetic2 in words_with_phonetics[i + 1:]
+                          if word2 not in rhyme_groups and word2 != word1]
+            if not candidates:
+                continue
+            
+            # Score this word against all candidates in one pass
+            similarities = self.rhyme_scorer.score_many(
+                phonetic1, [phonetic2 for _, phonetic2 in candidates])
+            matches = [word2 for (word2, _), similarity in zip(candidates, similarities)
+                       if similarity >= RHYME_THRESHOLD]
+            
+            # Only keep groups with multiple members
+            if matches:
+                rhyme_groups[word1] = rhyme_group_id
+                for word2 in matches:
+                    rhyme_groups[word2] = rhyme_group_id
                 rhyme_group_id += 1
-            else:
-                # Remove single-word groups (no rhymes found)
-                del rhyme_groups[word1]
         
         return rhyme_groups
     
-    def analyze_lyrics(self, lyrics: str) -> Dict:
+    def analyze_lyrics(self, lyrics: str, expand_repeats: bool = False,
+                       profile: str = 'full', time_budget: Optional[float] = None) -> Dict:
         """
         Analyze Hebrew rap lyrics for rhyme schemes and patterns
         
         Args:
             lyrics: Hebrew rap lyrics text
+            expand_repeats: Include full word data for repeated lines
+            profile: Name of an entry in ANALYSIS_PROFILES
+            time_budget: Seconds available for the analysis, None for no limit
+            
+        Returns:
+            Analysis results, see analyze_lines
+        """
+        return self.analyze_lines(lyrics.split('\n'), expand_repeats=expand_repeats,
+                                  profile=profile, time_budget=time_budget)
+    
+    def analyze_lines(self, raw_lines: Iterable[str], expand_repeats: bool = False,
+                      profile: str = 'full', time_budget: Optional[float] = None) -> Dict:
+        """
+        Analyze Hebrew rap lyrics given as raw lines for rhyme schemes and patterns
+        
+        Lines are cleaned as they are consumed, so raw_lines may be a
+        generator over an upload stream. Errors raised by the generator
+        (e.g. size limits) propagate to the caller.
+        
+        Identical lines (choruses, hooks) are transcribed only once. Repeated
+        lines reference their first occurrence through "repeat_of" unless
+        expand_repeats is set.
+        
+        When a time budget is given, it starts once all lines are read and is
+        checked between stages. Words not transcribed yet when it runs out
+        use their cached transcription or get the rule-based one. The
+        "analysis" block of the result counts the words whose transcription
+        changed and lists a sample of them.
+        
+        Args:
+            raw_lines: Raw Hebrew rap lyrics lines
+            expand_repeats: Include full word data for repeated lines
+            profile: Name of an entry in ANALYSIS_PROFILES
+            time_budget: Seconds available for the analysis, None for no limit
             
         Returns:
             Analysis results including rhyme schemes, groups, and statistics
         """
+        if profile not in ANALYSIS_PROFILES:
+            return {
+                "error": f"Unknown analysis profile: {profile}"
+            }
+        profile_config = ANALYSIS_PROFILES[profile]
+        
+        # Preprocess the text
+        lines = list(self.iter_clean_lines(raw_lines))
+        
+        # The budget covers the analysis, not the time spent reading the input
+        start = time.monotonic()
+        deadline = start + time_budget if time_budget is not None else None
+        
         try:
-            # Preprocess the text
-            cleaned_lyrics = self.preprocess_text(lyrics)
-            lines = [line.strip() for line in cleaned_lyrics.split('\n') if line.strip()]
-            
             if not lines:
                 return {
                     "error": "No valid Hebrew text found in lyrics"
                 }
             
+            repeat_of = self.find_repeated_lines(lines)
+            
             analysis_result = {
                 "lines": [],
                 "rhyme_scheme": "",
                 "rhyme_groups": {},
+                "repeated_sections": self.find_repeated_sections(repeat_of),
                 "statistics": {
                     "total_lines": len(lines),
                     "total_words": 0,
-                    "unique_rhymes": 0
+                    "unique_rhymes": 0,
+                    "repeated_lines": sum(1 for idx in repeat_of if idx is not None)
                 }
             }
             
             all_line_words = []
             line_end_words = []
             
+            # Transcribe the unique words of all unique lines up front, so that
+            # long lyrics can be sharded across the transcription pool
+            line_words = {
+                line_idx: self.extract_hebrew_words(line)
+                for line_idx, line in enumerate(lines) if repeat_of[line_idx] is None
+            }
+            # Stop words are never transcribed, wherever they are in the line
+            unique_words = {
+                word: None for words in line_words.values()
+                for word in words if not self.is_stop_word(word)
+            }
+            
+            if profile_config["model"]:
+                transcriptions, estimated_words, degraded_words = self.transcribe_words(
+                    list(unique_words), deadline)
+            else:
+                fallbacks = {word: self._fallback(word) for word in unique_words}
+                transcriptions = {word: phonetic for word, (phonetic, _) in fallbacks.items()}
+                estimated_words = {word for word, (_, estimated) in fallbacks.items() if estimated}
+                degraded_words = []
+            
             # Process each line
             for line_idx, line in enumerate(lines):
-                words = self.extract_hebrew_words(line)
+                source_idx = repeat_of[line_idx]
+                if source_idx is not None:
+                    # Reuse the analysis of the first occurrence
+                    source = analysis_result["lines"][source_idx]
+                    source_words = [(w["text"], w["phonetic"]) for w in source["words"]]
+                    
+                    if source["end_word"] and not self.is_stop_word(source["end_word"]["text"]):
+                        line_end_words.append((source["end_word"]["text"],
+                                               source["end_word"]["phonetic"], line_idx))
+                    
+                    line_result = {
+                        "line_number": line_idx + 1,
+                        "text": line,
+                        "repeat_of": source_idx + 1
+                    }
+                    if expand_repeats:
+                        line_result["words"] = source["words"]
+                        line_result["end_word"] = source["end_word"]
+                    analysis_result["lines"].append(line_result)
+                    
+                    all_line_words.extend(source_words)
+                    continue
+                
+                words = line_words[line_idx]
                 
                 if not words:
                     analysis_result["lines"].append({
@@ -327,14 +917,13 @@ class HebrewNLPProcessor:
                 # Get phonetic transcriptions for all words
                 words_with_phonetics = []
                 for word in words:
-                    if word not in self.stop_words:  # Skip common words
-                        phonetic = self.get_phonetic_transcription(word)
-                        words_with_phonetics.append((word, phonetic))
+                    if not self.is_stop_word(word):  # Skip common words
+                        words_with_phonetics.append((word, transcriptions.get(word)))
                 
                 # The last word in the line is typically the rhyming word
                 end_word = words[-1] if words else None
-                if end_word and end_word not in self.stop_words:
-                    end_phonetic = self.get_phonetic_transcription(end_word)
+                end_phonetic = transcriptions.get(end_word)
+                if end_word and not self.is_stop_word(end_word):
                     line_end_words.append((end_word, end_phonetic, line_idx))
                 
                 analysis_result["lines"].append({
@@ -348,7 +937,7 @@ class HebrewNLPProcessor:
                     ],
                     "end_word": {
                         "text": end_word,
-                        "phonetic": self.get_phonetic_transcription(end_word) if end_word else None
+                        "phonetic": end_phonetic
                     } if end_word else None
                 })
                 
@@ -391,6 +980,29 @@ class HebrewNLPProcessor:
             analysis_result["statistics"]["total_words"] = len(all_line_words)
             analysis_result["statistics"]["unique_rhymes"] = len(set(analysis_result["rhyme_groups"].keys()))
             
+            if profile_config["flow_metrics"]:
+                # Flow metrics cover every word including stop words, which
+                # are not transcribed and count as one syllable. Vowels of the
+                # letter-mapping fallback are guesses, its syllables are not counted.
+                source_lines = [line_words[idx if repeat_of[idx] is None else repeat_of[idx]]
+                                for idx in range(len(lines))]
+                bar_metrics, flow_statistics = compute_flow_metrics(
+                    [[transcriptions.get(word) for word in words] for words in source_lines],
+                    [[word in estimated_words for word in words] for words in source_lines]
+                )
+                for line_result, metrics in zip(analysis_result["lines"], bar_metrics):
+                    line_result["flow"] = metrics
+                analysis_result["statistics"].update(flow_statistics)
+            
+            analysis_result["analysis"] = {
+                "profile": profile,
+                "time_budget_ms": round(time_budget * 1000) if time_budget is not None else None,
+                "elapsed_ms": round((time.monotonic() - start) * 1000, 2),
+                "degraded": bool(degraded_words),
+                "degraded_count": len(degraded_words),
+                "degraded_words": degraded_words[:DEGRADED_SAMPLE_SIZE]
+            }
+            
             return analysis_result
             
         except Exception as e:
@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator
+
+
+class ModelPool:
+    """
+    Bounded pool of model instances for concurrent request threads
+
+    Each instance is used by one thread at a time: callers check an
+    instance out, run inference and return it. Callers block while all
+    instances are in use and are served in arrival order, a returned
+    instance is handed to the longest waiting caller rather than to
+    whichever thread asks next. The time spent waiting is recorded.
+    """
+
+    def __init__(self, factory: Callable[[], Any], size: int = 1):
+        """
+        Create the pool and load all model instances up front
+
+        Args:
+            factory: Callable creating one model instance
+            size: Number of instances in the pool
+        """
+        if size < 1:
+            raise ValueError("Model pool size must be at least 1")
+
+        self.size = size
+        self._idle = [factory() for _ in range(size)]
+        # One [model] slot per blocked caller, filled in arrival order
+        self._waiters = deque()
+
+        self._lock = threading.Condition()
+        self._checkouts = 0
+        self._waited = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    @contextmanager
+    def checkout(self) -> Iterator[Any]:
+        """
+        Borrow a model instance for the duration of the with block
+
+        Yields:
+            Model instance reserved for the calling thread
+        """
+        start = time.perf_counter()
+        with self._lock:
+            if self._idle and not self._waiters:
+                model = self._idle.pop()
+                wait = 0.0
+            else:
+                slot = []
+                self._waiters.append(slot)
+                while not slot:
+                    self._lock.wait()
+                model = slot[0]
+                wait = time.perf_counter() - start
+
+            self._checkouts += 1
+            if wait:
+                self._waited += 1
+                self._total_wait += wait
+                self._max_wait = max(self._max_wait, wait)
+
+        try:
+            yield model
+        finally:
+            self._release(model)
+
+    def _release(self, model: Any):
+        """Hand a returned instance to the first waiter or put it back"""
+        with self._lock:
+            if self._waiters:
+                self._waiters.popleft().append(model)
+                self._lock.notify_all()
+            else:
+                self._idle.append(model)
+
+    def stats(self) -> Dict:
+        """
+        Report pool usage and wait-time metrics
+
+        Returns:
+            Dictionary with size, instances in use and checkout wait times
+        """
+        with self._lock:
+            return {
+                "size": self.size,
+                "in_use": self.size - len(self._idle),
+                "waiting": len(self._waiters),
+                "checkouts": self._checkouts,
+                "waited": self._waited,
+                "total_wait_ms": round(self._total_wait * 1000, 2),
+                "max_wait_ms": round(self._max_wait * 1000, 2),
+                "mean_wait_ms": round(self._total_wait / self._checkouts * 1000, 3)
+                if self._checkouts else 0.0
+            }
@@ -0,0 +1,166 @@
+import threading
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+import numpy as np
+
+# Number of hash permutations in a MinHash signature
+NUM_PERM = 128
+
+# LSH banding: BANDS x ROWS must equal NUM_PERM. A pair with Jaccard
+# similarity s becomes a candidate with probability 1 - (1 - s**ROWS)**BANDS,
+# about 87% at the default query threshold of 0.5 and over 99% from 0.6
+BANDS = 32
+ROWS = 4
+
+# Length of the phoneme n-grams used as shingles
+SHINGLE_SIZE = 5
+
+# Shingles hashed per NumPy pass, bounds the num_perm x block temporaries
+# to a few MB however long the song is
+SIGNATURE_BLOCK = 4096
+
+# Prime just above 2**32 for the universal hash family
+_PRIME = np.uint64(4294967311)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+
+
+def song_phonetics(analysis: Dict) -> List[str]:
+    """
+    Collect the word transcriptions of an analysis in line order
+
+    Gives the same sequence as HebrewNLPProcessor.transcribe_song for the
+    same lyrics.
+
+    Args:
+        analysis: Result of HebrewNLPProcessor.analyze_lyrics, repeated
+            lines may be references to their first occurrence
+
+    Returns:
+        Phonetic transcriptions of all transcribed words
+    """
+    lines = analysis["lines"]
+    phonetics = []
+    for line in lines:
+        source = lines[line["repeat_of"] - 1] if line.get("repeat_of") else line
+        phonetics.extend(word["phonetic"] for word in source.get("words", []) if word["phonetic"])
+    return phonetics
+
+
+def phonetic_shingles(phonetics: Iterable[str], size: int = SHINGLE_SIZE) -> Set[int]:
+    """
+    Hash the phoneme n-grams of a song
+
+    Args:
+        phonetics: Word transcriptions in order
+        size: n-gram length in phoneme characters
+
+    Returns:
+        Set of 32-bit shingle hashes
+    """
+    stream = '|'.join(phonetic.replace(' ', '') for phonetic in phonetics)
+    if len(stream) < size:
+        return {zlib.crc32(stream.encode('utf-8'))} if stream else set()
+    return {zlib.crc32(stream[i:i + size].encode('utf-8'))
+            for i in range(len(stream) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures computed for all permutations at once, block by block"""
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        # a < 2**32 and shingle hashes < 2**32 keep a * x within uint64
+        self._a = rng.randint(1, 2 ** 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 2 ** 32, size=num_perm, dtype=np.uint64)
+        self.num_perm = num_perm
+
+    def signature(self, shingles: Set[int]) -> np.ndarray:
+        """
+        Compute the MinHash signature of a shingle set
+
+        Args:
+            shingles: 32-bit shingle hashes
+
+        Returns:
+            uint32 array of length num_perm
+        """
+        if not shingles:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+        values = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+        signature = np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        for start in range(0, len(values), SIGNATURE_BLOCK):
+            block = values[start:start + SIGNATURE_BLOCK]
+            hashes = (self._a[:, None] * block[None, :] % _PRIME + self._b[:, None]) % _PRIME
+            np.minimum(signature, (hashes & _MAX_HASH).min(axis=1), out=signature)
+        return signature.astype(np.uint32)
+
+
+def estimate_similarity(signature1: np.ndarray, signature2: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures"""
+    return float(np.mean(signature1 == signature2))
+
+
+class LSHIndex:
+    """
+    Locality-sensitive hashing index over MinHash signatures
+
+    Signatures are split into BANDS bands of ROWS values, songs sharing any
+    band land in the same bucket and become candidates. A query only looks
+    at its own buckets, not at the whole catalogue.
+    """
+
+    def __init__(self, bands: int = BANDS, rows: int = ROWS):
+        self.bands = bands
+        self.rows = rows
+        self._buckets: List[Dict[bytes, List[int]]] = [defaultdict(list) for _ in range(bands)]
+        self._signatures: Dict[int, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        """Bucket key of every band"""
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes()
+                for band in range(self.bands)]
+
+    def add(self, key: int, signature: np.ndarray):
+        """
+        Index a signature
+
+        Args:
+            key: Song ID
+            signature: MinHash signature with bands x rows values
+        """
+        with self._lock:
+            if key in self._signatures:
+                return
+            self._signatures[key] = signature
+            for band, band_key in enumerate(self._band_keys(signature)):
+                self._buckets[band][band_key].append(key)
+
+    def query(self, signature: np.ndarray, threshold: float = 0.5,
+              limit: int = 10) -> List[Tuple[int, float]]:
+        """
+        Find indexed songs similar to a signature
+
+        Args:
+            signature: MinHash signature of the submitted song
+            threshold: Minimum estimated Jaccard similarity
+            limit: Maximum number of results
+
+        Returns:
+            List of (song ID, estimated similarity), most similar first
+        """
+        with self._lock:
+            candidates = set()
+            for band, band_key in enumerate(self._band_keys(signature)):
+                candidates.update(self._buckets[band].get(band_key, ()))
+            scored = [(key, estimate_similarity(signature, self._signatures[key]))
+                      for key in candidates]
+
+        scored = [(key, similarity) for key, similarity in scored if similarity >= threshold]
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:limit]
+
+    def __len__(self) -> int:
+        return len(self._signatures)
@@ -0,0 +1,187 @@
+import re
+from typing import List, Tuple
+
+# Niqqud marks kept on words: vowel points, dagesh, meteg, rafe, shin/sin dots
+NIQQUD_PATTERN = re.compile(r'[\u05B0-\u05BD\u05BF\u05C1\u05C2\u05C7]')
+
+# Cantillation marks (te'amim) and the upper and lower puncta of vocalized
+# biblical and liturgical text, they carry no vowel and are dropped
+CANTILLATION_PATTERN = re.compile(r'[\u0591-\u05AF\u05C4\u05C5]')
+
+# Minimum share of letters carrying a vowel for the rule-based path
+MIN_VOWEL_RATIO = 0.5
+
+SHEVA = '\u05B0'
+HATAF_SEGOL = '\u05B1'
+HATAF_PATAH = '\u05B2'
+HATAF_QAMATS = '\u05B3'
+HIRIQ = '\u05B4'
+TSERE = '\u05B5'
+SEGOL = '\u05B6'
+PATAH = '\u05B7'
+QAMATS = '\u05B8'
+HOLAM = '\u05B9'
+HOLAM_HASER_FOR_VAV = '\u05BA'
+QUBUTS = '\u05BB'
+DAGESH = '\u05BC'
+SHIN_DOT = '\u05C1'
+SIN_DOT = '\u05C2'
+QAMATS_QATAN = '\u05C7'
+
+VOWEL_SOUNDS = {
+    HATAF_SEGOL: 'e', HATAF_PATAH: 'a', HATAF_QAMATS: 'o',
+    HIRIQ: 'i', TSERE: 'e', SEGOL: 'e', PATAH: 'a', QAMATS: 'a',
+    HOLAM: 'o', HOLAM_HASER_FOR_VAV: 'o', QUBUTS: 'u', QAMATS_QATAN: 'o',
+}
+
+CONSONANT_SOUNDS = {
+    'א': '', 'ג': 'g', 'ד': 'd', 'ה': 'h', 'ז': 'z', 'ח': 'χ', 'ט': 't',
+    'י': 'j', 'ל': 'l', 'מ': 'm', 'ם': 'm', 'נ': 'n', 'ן': 'n', 'ס': 's',
+    'ע': '', 'צ': 'ts', 'ץ': 'ts', 'ק': 'k', 'ר': 'ʁ', 'ת': 't', 'ו': 'v',
+}
+
+# Letters whose sound changes with dagesh: (with dagesh, without dagesh)
+BEGED_KEFET = {
+    'ב': ('b', 'v'), 'כ': ('k', 'χ'), 'ך': ('k', 'χ'), 'פ': ('p', 'f'), 'ף': ('p', 'f'),
+}
+
+# Letters that are silent when they only mark a preceding vowel
+MATRES_LECTIONIS = {'א', 'ה', 'י'}
+
+
+def strip_niqqud(word: str) -> str:
+    """
+    Remove niqqud marks from a Hebrew word
+
+    Args:
+        word: Hebrew word, possibly vocalized
+
+    Returns:
+        Word with letters only
+    """
+    return NIQQUD_PATTERN.sub('', word)
+
+
+def strip_cantillation(text: str) -> str:
+    """
+    Remove cantillation marks from Hebrew text
+
+    Args:
+        text: Hebrew text, possibly with te'amim
+
+    Returns:
+        Text with letters and niqqud only
+    """
+    return CANTILLATION_PATTERN.sub('', text)
+
+
+def split_letters(word: str) -> List[Tuple[str, str]]:
+    """
+    Split a vocalized word into letters with their marks
+
+    Args:
+        word: Hebrew word with niqqud
+
+    Returns:
+        List of (letter, marks) tuples
+    """
+    letters = []
+    for char in word:
+        if NIQQUD_PATTERN.match(char):
+            if letters:
+                letter, marks = letters[-1]
+                letters[-1] = (letter, marks + char)
+        else:
+            letters.append((char, ''))
+    return letters
+
+
+def _vowel_of(letter: str, marks: str) -> str:
+    """Vowel sound carried by a letter, including shuruk and holam male"""
+    for mark in marks:
+        if mark in VOWEL_SOUNDS:
+            return VOWEL_SOUNDS[mark]
+    if letter == 'ו' and marks == DAGESH:
+        return 'u'
+    return ''
+
+
+def has_sufficient_niqqud(word: str) -> bool:
+    """
+    Check whether a word is vocalized enough to be transliterated by rules
+
+    Args:
+        word: Hebrew word
+
+    Returns:
+        True if at least MIN_VOWEL_RATIO of the letters before the last one
+        carry a vowel
+    """
+    if not NIQQUD_PATTERN.search(word):
+        return False
+    letters = split_letters(word)
+    if len(letters) < 2:
+        return False
+    # The final letter is usually unvocalized, don't count it
+    voweled = sum(1 for letter, marks in letters[:-1] if _vowel_of(letter, marks))
+    return voweled / (len(letters) - 1) >= MIN_VOWEL_RATIO
+
+
+def transliterate(word: str) -> str:
+    """
+    Deterministic phonetic transcription of a vocalized Hebrew word
+
+    Args:
+        word: Hebrew word with niqqud
+
+    Returns:
+        Space separated phonemes in the same format as the G2P output
+    """
+    letters = split_letters(word)
+    phonemes = []
+    last = len(letters) - 1
+
+    for idx, (letter, marks) in enumerate(letters):
+        vowel = _vowel_of(letter, marks)
+
+        # Holam male and shuruk are pure vowels after an unvocalized letter,
+        # otherwise the vav is a consonant
+        if letter == 'ו' and marks in (HOLAM, DAGESH):
+            if idx == 0 or not _vowel_of(*letters[idx - 1]):
+                phonemes.append(vowel)
+                continue
+            if marks == DAGESH:
+                vowel = ''
+
+        # Silent matres lectionis after a vowel, and unvocalized final he
+        if letter in MATRES_LECTIONIS and not vowel and DAGESH not in marks and idx > 0:
+            if letter != 'י' or (phonemes and phonemes[-1] in ('i', 'e')):
+                continue
+            # Yod of the suffix -ָיו is silent, the word ends in 'av'
+            if idx == last - 1 and letters[last] == ('ו', '') and phonemes and phonemes[-1] == 'a':
+                continue
+
+        if letter in BEGED_KEFET:
+            hard, soft = BEGED_KEFET[letter]
+            consonant = hard if DAGESH in marks else soft
+        elif letter == 'ש':
+            consonant = 's' if SIN_DOT in marks else 'ʃ'
+        else:
+            consonant = CONSONANT_SOUNDS.get(letter, '')
+
+        # Patah genuvah: the vowel of a final guttural is pronounced before it
+        if idx == last and vowel == 'a' and PATAH in marks and letter in ('ח', 'ע', 'ה'):
+            phonemes.append('a')
+            if consonant:
+                phonemes.append(consonant)
+            continue
+
+        if consonant:
+            phonemes.append(consonant)
+        if vowel:
+            phonemes.append(vowel)
+        elif SHEVA in marks and idx == 0:
+            # Vocal sheva at the start of the word
+            phonemes.append('e')
+
+    return ' '.join(phonemes)
@@ -0,0 +1,319 @@
+from functools import lru_cache
+from typing import List, Tuple
+
+import numpy as np
+
+# Longest coda (consonants after the final stressed vowel) taken into account
+MAX_CODA = 4
+
+# Weight of the coda in the final score, the stressed vowel carries the rest.
+# Above 1 - RHYME_THRESHOLD, so a mismatched coda rejects a pair even when
+# the stressed vowels agree
+CODA_WEIGHT = 0.7
+
+# Weights of coda positions, right-aligned, the final phoneme counts most
+CODA_POSITION_WEIGHTS = (0.125, 0.25, 0.5, 1.0)
+
+# Minimum score for two words to be placed in the same rhyme group
+RHYME_THRESHOLD = 0.65
+
+# Stress mark emitted by the G2P model before the stressed syllable
+STRESS_MARK = 'ˈ'
+
+# Weights of the final letters compared for letter-mapped transcriptions,
+# up to the last letter. The letter mapping guesses vowels, so no stressed
+# vowel can anchor the rhyme.
+LETTER_TAIL_WEIGHTS = (0.4, 0.6)
+LETTER_TAIL = len(LETTER_TAIL_WEIGHTS)
+
+# Vowel features: (height, backness, rounding)
+VOWEL_FEATURES = {
+    'a': (0.0, 0.5, 0.0),
+    'e': (0.5, 0.0, 0.0),
+    'i': (1.0, 0.0, 0.0),
+    'o': (0.5, 1.0, 1.0),
+    'u': (1.0, 1.0, 1.0),
+}
+
+# Consonant features: (place, manner, voicing)
+# place: bilabial 0 ... glottal 1, manner: stop 0 ... approximant 1
+CONSONANT_FEATURES = {
+    'p': (0.0, 0.0, 0.0), 'b': (0.0, 0.0, 1.0), 'm': (0.0, 0.75, 1.0),
+    'f': (0.15, 0.5, 0.0), 'v': (0.15, 0.5, 1.0), 'w': (0.0, 1.0, 1.0),
+    't': (0.4, 0.0, 0.0), 'd': (0.4, 0.0, 1.0), 'n': (0.4, 0.75, 1.0),
+    's': (0.4, 0.5, 0.0), 'z': (0.4, 0.5, 1.0), 'ts': (0.4, 0.25, 0.0),
+    'l': (0.4, 1.0, 1.0), 'r': (0.9, 1.0, 1.0), 'ʁ': (0.9, 0.5, 1.0),
+    'sh': (0.55, 0.5, 0.0), 'ʃ': (0.55, 0.5, 0.0), 'ʒ': (0.55, 0.5, 1.0),
+    'tʃ': (0.55, 0.25, 0.0), 'dʒ': (0.55, 0.25, 1.0), 'j': (0.7, 1.0, 1.0),
+    'k': (0.85, 0.0, 0.0), 'g': (0.85, 0.0, 1.0), 'ɡ': (0.85, 0.0, 1.0),
+    'ch': (0.85, 0.5, 0.0), 'x': (0.85, 0.5, 0.0), 'χ': (0.9, 0.5, 0.0),
+    'h': (1.0, 0.5, 0.0), 'ʔ': (1.0, 0.0, 0.0),
+}
+
+# Relative weights of (place, manner, voicing) in consonant distance, nasals
+# rhyme with nasals (kam/gan) more readily than with fricatives (lom/tov)
+CONSONANT_WEIGHTS = (1.0, 2.0, 0.5)
+
+# Feature distances between consonants are small, stretch them so that
+# unrelated consonants do not look like near rhymes
+CONSONANT_DISTANCE_SCALE = 3.0
+
+# Multi-character phonemes, matched before single characters
+DIGRAPHS = ('ts', 'tʃ', 'dʒ', 'sh', 'ch')
+
+PHONEMES = list(VOWEL_FEATURES) + list(CONSONANT_FEATURES)
+PHONEME_INDEX = {phoneme: idx for idx, phoneme in enumerate(PHONEMES)}
+
+# Special symbols appended after the phoneme inventory
+UNKNOWN = len(PHONEMES)      # Phoneme missing from the inventory
+NO_VOWEL = UNKNOWN + 1       # Word without any vowel
+GAP = NO_VOWEL + 1           # Padding for codas of different lengths
+
+
+def _build_distance_matrix() -> np.ndarray:
+    """
+    Build the pairwise phoneme distance matrix from the feature tables
+
+    Returns:
+        Square float32 matrix of distances in [0, 1] indexed by PHONEME_INDEX,
+        including rows for the UNKNOWN, NO_VOWEL and GAP symbols
+    """
+    size = GAP + 1
+    matrix = np.ones((size, size), dtype=np.float32)
+
+    vowels = np.array(list(VOWEL_FEATURES.values()), dtype=np.float32)
+    vowel_dist = np.abs(vowels[:, None, :] - vowels[None, :, :]).mean(axis=2)
+    vowel_count = len(vowels)
+    matrix[:vowel_count, :vowel_count] = vowel_dist
+
+    consonants = np.array(list(CONSONANT_FEATURES.values()), dtype=np.float32)
+    weights = np.array(CONSONANT_WEIGHTS, dtype=np.float32)
+    consonant_dist = (np.abs(consonants[:, None, :] - consonants[None, :, :]) * weights).sum(axis=2)
+    consonant_dist = np.minimum(consonant_dist / weights.sum() * CONSONANT_DISTANCE_SCALE, 1.0)
+    matrix[vowel_count:UNKNOWN, vowel_count:UNKNOWN] = consonant_dist
+
+    matrix[UNKNOWN, UNKNOWN] = 0.5
+    matrix[NO_VOWEL, NO_VOWEL] = 0.0
+    matrix[GAP, GAP] = 0.0
+    return matrix
+
+
+# Loaded once at import time and shared by every scorer
+DISTANCE_MATRIX = _build_distance_matrix()
+_DISTANCE_ROWS = DISTANCE_MATRIX.tolist()
+_VOWELS = frozenset(PHONEME_INDEX[vowel] for vowel in VOWEL_FEATURES)
+_POSITION_WEIGHTS = np.array(CODA_POSITION_WEIGHTS, dtype=np.float32)
+_LETTER_TAIL_WEIGHTS = np.array(LETTER_TAIL_WEIGHTS, dtype=np.float32)
+
+# Total position weight of a coda by its length
+_WEIGHT_TOTALS = np.concatenate(([0.0], np.cumsum(_POSITION_WEIGHTS[::-1]))).astype(np.float32)
+_WEIGHT_TOTAL_LIST = _WEIGHT_TOTALS.tolist()
+
+
+@lru_cache(maxsize=20000)
+def tokenize_phonetic(phonetic: str) -> Tuple[Tuple[int, ...], int]:
+    """
+    Split a phonetic transcription into phoneme indices
+
+    Args:
+        phonetic: Transcription from the G2P model or the fallback mapping
+
+    Returns:
+        Tuple of (phoneme indices, position of the last stress mark or -1)
+    """
+    indices = []
+    stress_pos = -1
+    text = phonetic.replace(' ', '').lower()
+    pos = 0
+    while pos < len(text):
+        if text[pos] == STRESS_MARK:
+            stress_pos = len(indices)
+            pos += 1
+            continue
+        digraph = text[pos:pos + 2]
+        if digraph in DIGRAPHS:
+            indices.append(PHONEME_INDEX[digraph])
+            pos += 2
+            continue
+        char = text[pos]
+        if char.isalpha():
+            indices.append(PHONEME_INDEX.get(char, UNKNOWN))
+        pos += 1
+    return tuple(indices), stress_pos
+
+
+@lru_cache(maxsize=20000)
+def rhyme_tail(phonetic: str) -> Tuple[int, Tuple[int, ...]]:
+    """
+    Extract the final stressed vowel and its coda
+
+    Args:
+        phonetic: Phonetic transcription
+
+    Returns:
+        Tuple of (vowel index or NO_VOWEL, coda indices padded on the left
+        with GAP to MAX_CODA)
+    """
+    indices, stress_pos = tokenize_phonetic(phonetic)
+
+    nucleus = -1
+    if stress_pos >= 0:
+        for pos in range(stress_pos, len(indices)):
+            if indices[pos] in _VOWELS:
+                nucleus = pos
+                break
+    if nucleus < 0:
+        for pos in range(len(indices) - 1, -1, -1):
+            if indices[pos] in _VOWELS:
+                nucleus = pos
+                break
+
+    if nucleus < 0:
+        vowel, coda = NO_VOWEL, indices[-MAX_CODA:]
+    else:
+        vowel, coda = indices[nucleus], indices[nucleus + 1:][-MAX_CODA:]
+    return vowel, (GAP,) * (MAX_CODA - len(coda)) + coda
+
+
+def rhyme_ending(phonetic: str) -> str:
+    """
+    Canonical rhyme ending of a transcription, used as an index key
+
+    Args:
+        phonetic: Phonetic transcription
+
+    Returns:
+        Final stressed vowel and coda as a phoneme string, e.g. 'om'
+    """
+    vowel, coda = rhyme_tail(phonetic)
+    symbols = [vowel] + list(coda) if vowel != NO_VOWEL else list(coda)
+    return ''.join(PHONEMES[idx] for idx in symbols if idx < UNKNOWN)
+
+
+def is_letter_mapped(phonetic: str) -> bool:
+    """
+    Check whether a transcription comes from the letter-by-letter mapping
+
+    The G2P model and the niqqud rules emit space separated phonemes, the
+    letter mapping emits one unmarked run of letters.
+    """
+    return ' ' not in phonetic and STRESS_MARK not in phonetic
+
+
+@lru_cache(maxsize=20000)
+def letter_tail(phonetic: str) -> Tuple[int, ...]:
+    """
+    Last LETTER_TAIL phonemes of a transcription, vowels included, padded on
+    the left with GAP
+    """
+    indices = tokenize_phonetic(phonetic)[0][-LETTER_TAIL:]
+    return (GAP,) * (LETTER_TAIL - len(indices)) + indices
+
+
+def _letter_tail_distance(phonetic1: str, phonetic2: str) -> float:
+    """Weighted distance between the aligned final letters of two transcriptions"""
+    return sum(weight * _DISTANCE_ROWS[a][b] for weight, a, b
+               in zip(LETTER_TAIL_WEIGHTS, letter_tail(phonetic1), letter_tail(phonetic2)))
+
+
+def _coda_length(coda: Tuple[int, ...]) -> int:
+    """Number of real phonemes in a padded coda"""
+    return MAX_CODA - coda.count(GAP)
+
+
+def _combine(vowel_sim, coda_dist):
+    """Combine vowel similarity and coda distance into the final score"""
+    return vowel_sim * (1.0 - CODA_WEIGHT * coda_dist)
+
+
+class RhymeScorer:
+    """
+    Vowel-aware rhyme scoring using a precomputed phoneme distance matrix
+
+    Two words are compared on their final stressed vowel and the consonants
+    following it, aligned from the end of the word. Each comparison costs
+    O(MAX_CODA) table lookups. Without a vowel to anchor the rhyme (letter
+    mapped transcriptions, words without vowels) only the final letters
+    are compared.
+    """
+
+    def score(self, phonetic1: str, phonetic2: str) -> float:
+        """
+        Calculate the rhyme similarity between two transcriptions
+
+        Args:
+            phonetic1: Phonetic transcription of first word
+            phonetic2: Phonetic transcription of second word
+
+        Returns:
+            Similarity score (0.0 - 1.0)
+        """
+        if phonetic1 == phonetic2:
+            return 1.0
+        if not phonetic1 or not phonetic2:
+            return 0.0
+
+        vowel1, coda1 = rhyme_tail(phonetic1)
+        vowel2, coda2 = rhyme_tail(phonetic2)
+        if (vowel1 == NO_VOWEL or vowel2 == NO_VOWEL or
+                is_letter_mapped(phonetic1) or is_letter_mapped(phonetic2)):
+            return 1.0 - _letter_tail_distance(phonetic1, phonetic2)
+
+        weight_total = _WEIGHT_TOTAL_LIST[max(_coda_length(coda1), _coda_length(coda2))]
+        if weight_total:
+            coda_dist = sum(weight * _DISTANCE_ROWS[a][b] for weight, a, b
+                            in zip(CODA_POSITION_WEIGHTS, coda1, coda2)) / weight_total
+        else:
+            coda_dist = 0.0
+
+        vowel_sim = 1.0 - _DISTANCE_ROWS[vowel1][vowel2]
+        return _combine(vowel_sim, coda_dist)
+
+    def score_many(self, phonetic: str, candidates: List[str]) -> np.ndarray:
+        """
+        Score one transcription against many candidates in a single pass
+
+        Args:
+            phonetic: Phonetic transcription to compare
+            candidates: Candidate transcriptions
+
+        Returns:
+            Array of similarity scores aligned with candidates
+        """
+        if not candidates:
+            return np.zeros(0, dtype=np.float32)
+
+        vowel, coda = rhyme_tail(phonetic)
+        tails = [rhyme_tail(candidate) for candidate in candidates]
+        vowels = np.fromiter((tail[0] for tail in tails), dtype=np.intp, count=len(tails))
+        codas = np.array([tail[1] for tail in tails], dtype=np.intp)
+
+        coda_lens = np.maximum((codas != GAP).sum(axis=1), _coda_length(coda))
+        weight_totals = _WEIGHT_TOTALS[coda_lens]
+        coda_sum = (DISTANCE_MATRIX[np.array(coda, dtype=np.intp), codas] * _POSITION_WEIGHTS).sum(axis=1)
+        coda_dist = np.divide(coda_sum, weight_totals, out=np.zeros_like(coda_sum),
+                              where=weight_totals > 0)
+
+        vowel_sim = 1.0 - DISTANCE_MATRIX[vowel, vowels]
+        scores = _combine(vowel_sim, coda_dist)
+
+        # Pairs without an anchoring vowel compare their final letters only
+        unanchored = vowels == NO_VOWEL
+        if vowel == NO_VOWEL or is_letter_mapped(phonetic):
+            unanchored[:] = True
+        else:
+            unanchored |= np.fromiter((is_letter_mapped(candidate) for candidate in candidates),
+                                      dtype=bool, count=len(candidates))
+        if unanchored.any():
+            letters = np.array([letter_tail(candidates[idx]) for idx in np.flatnonzero(unanchored)],
+                               dtype=np.intp)
+            own_letters = np.array(letter_tail(phonetic), dtype=np.intp)
+            scores[unanchored] = 1.0 - DISTANCE_MATRIX[own_letters, letters] @ _LETTER_TAIL_WEIGHTS
+
+        # Identical and empty transcriptions follow the same rules as score()
+        for idx, candidate in enumerate(candidates):
+            if candidate == phonetic:
+                scores[idx] = 1.0
+            elif not candidate or not phonetic:
+                scores[idx] = 0.0
+        return scores
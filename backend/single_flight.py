@@ -0,0 +1,94 @@
+import hashlib
+import logging
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def make_key(*parts: Any) -> str:
+    """
+    Build a compact coalescing key from request parts
+
+    Args:
+        parts: Values that together identify the computation
+
+    Returns:
+        Hex digest of the parts
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(repr(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical computations within a process
+
+    The first caller for a key runs the computation, callers arriving while
+    it is in flight wait for the same result or exception. Nothing is kept
+    once the computation finishes, this is not a cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """
+        Run fn once for all concurrent callers with the same key
+
+        Args:
+            key: Identifies identical computations
+            fn: Computation to run
+            timeout: Seconds a waiting caller waits for the result, None waits
+                forever. The caller running fn is not limited.
+
+        Returns:
+            Result of fn
+
+        Raises:
+            TimeoutError: A waiting caller timed out
+            Exception: Whatever fn raised, re-raised in every caller
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            try:
+                return future.result(timeout=timeout)
+            except FutureTimeoutError:
+                raise TimeoutError(f"Timed out waiting for in-flight computation {key[:12]}")
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Counters of computations run and callers served by coalescing"""
+        with self._lock:
+            return {
+                "in_flight": len(self._in_flight),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced
+            }
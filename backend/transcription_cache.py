@@ -0,0 +1,60 @@
+import threading
+from typing import Any, Dict, Hashable, Optional
+
+
+class TranscriptionCache:
+    """
+    Thread-safe least-recently-used cache of word transcriptions
+
+    Unlike functools.lru_cache it can be looked into without computing a
+    missing entry, which lets callers past their deadline use cached
+    transcriptions and fall back only for the words that are not cached.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        # Dicts keep insertion order, the first entry is the least recently used
+        self._entries: Dict[Hashable, Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Look up an entry and mark it as recently used
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value, None when the key is not cached
+        """
+        with self._lock:
+            value = self._entries.pop(key, None)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries[key] = value
+            self.hits += 1
+            return value
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Look up an entry without changing its recency or the statistics"""
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key: Hashable, value: Any):
+        """Store an entry, evicting the least recently used one when full"""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            if len(self._entries) > self.maxsize:
+                del self._entries[next(iter(self._entries))]
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
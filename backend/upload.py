@@ -0,0 +1,51 @@
+import codecs
+from typing import BinaryIO, Iterator
+
+# Bytes read from the upload stream at a time
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the configured maximum size"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Upload exceeds the maximum size of {max_bytes} bytes")
+        self.max_bytes = max_bytes
+
+
+def iter_stream_lines(stream: BinaryIO, max_bytes: int,
+                      chunk_size: int = READ_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Decode a UTF-8 byte stream into lines without reading it all at once
+
+    Args:
+        stream: Binary stream, e.g. request.stream or an uploaded file
+        max_bytes: Maximum number of bytes to accept
+        chunk_size: Bytes read per call
+
+    Yields:
+        Lines without their line terminator
+
+    Raises:
+        UploadTooLarge: As soon as more than max_bytes have been read
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    total = 0
+    pending = ''
+
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > max_bytes:
+            raise UploadTooLarge(max_bytes)
+
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split('\n')
+        for line in lines:
+            yield line.rstrip('\r')
+
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending.rstrip('\r')
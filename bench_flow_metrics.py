@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark the vectorized flow metrics against a per-word Python loop and
+against the cost of analyzing the same lyrics
+"""
+import sys
+import os
+import random
+import time
+
+# Set UTF-8 encoding for Windows
+if sys.platform == 'win32':
+    os.environ['PYTHONIOENCODING'] = 'utf-8'
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from bench_rhyme_scoring import make_ipa_words
+from flow_metrics import compute_flow_metrics, RHYME_WINDOW_BARS
+from hebrew_nlp import HebrewNLPProcessor
+from rhyme_scoring import NO_VOWEL, PHONEME_INDEX, VOWEL_FEATURES, rhyme_tail, tokenize_phonetic
+
+HEBREW_LETTERS = 'אבגדהוזחטיכלמנסעפצקרשת'
+
+def loop_flow_metrics(bars, window=RHYME_WINDOW_BARS):
+    """Straightforward per-word reference, kept to check the results"""
+    vowels = {PHONEME_INDEX[vowel] for vowel in VOWEL_FEATURES}
+    keys = []
+    bar_syllables = []
+    for bar in bars:
+        bar_keys = []
+        syllable_count = 0
+        for phonetic in bar:
+            syllables, key = 1, None
+            if phonetic:
+                syllables = max(1, sum(1 for idx in tokenize_phonetic(phonetic)[0] if idx in vowels))
+                tail = rhyme_tail(phonetic)
+                key = tail if tail[0] != NO_VOWEL else None
+            syllable_count += syllables
+            bar_keys.append(key)
+        keys.append(bar_keys)
+        bar_syllables.append(syllable_count)
+
+    bar_rhymes = [[] for _ in bars]
+    for line_idx, bar_keys in enumerate(keys):
+        nearby = range(max(0, line_idx - window), min(len(bars), line_idx + window + 1))
+        for position, key in enumerate(bar_keys):
+            if key is not None and any(other_key == key and bars[other_line][other_pos] != bars[line_idx][position]
+                                       for other_line in nearby
+                                       for other_pos, other_key in enumerate(keys[other_line])):
+                bar_rhymes[line_idx].append(position)
+    return bar_syllables, bar_rhymes
+
+def make_bars(line_count, seed=42):
+    """Generate lines of IPA-style transcriptions with stop-word gaps"""
+    rng = random.Random(seed)
+    vocabulary = make_ipa_words(3000, rng)
+    return [[None if rng.random() < 0.2 else rng.choice(vocabulary)
+             for _ in range(rng.randint(4, 10))] for _ in range(line_count)]
+
+def make_lyrics(line_count, seed=42):
+    """Generate Hebrew-letter lyrics for the end-to-end comparison"""
+    rng = random.Random(seed)
+    vocabulary = [''.join(rng.choice(HEBREW_LETTERS) for _ in range(rng.randint(2, 6)))
+                  for _ in range(3000)]
+    return '\n'.join(' '.join(rng.choice(vocabulary) for _ in range(rng.randint(4, 10)))
+                     for _ in range(line_count))
+
+def best_of(func, repeat=5):
+    """Best wall time of func over repeat runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    """Compare flow metric throughput and check it against the reference"""
+    print("Flow metrics")
+    print("=" * 60)
+    for line_count in (100, 1000, 5000):
+        bars = make_bars(line_count)
+        vectorized = best_of(lambda: compute_flow_metrics(bars))
+        loop = best_of(lambda: loop_flow_metrics(bars), repeat=3)
+        bar_metrics, _ = compute_flow_metrics(bars)
+        syllables, rhymes = loop_flow_metrics(bars)
+        assert syllables == [bar["syllables"] for bar in bar_metrics]
+        assert rhymes == [bar["rhyme_positions"] for bar in bar_metrics]
+        print(f"  {line_count:>5} bars  vectorized {vectorized * 1000:8.2f} ms  "
+              f"loop {loop * 1000:9.2f} ms  ({loop / vectorized:.1f}x)")
+
+    print()
+    print("Share of analyze_lyrics")
+    print("=" * 60)
+    processor = HebrewNLPProcessor()
+    if processor.g2p_pool is None:
+        print("  G2P model not available, analysis uses the rule-based fallback")
+    for line_count in (100, 1000, 5000):
+        lyrics = make_lyrics(line_count)
+        processor.transcription_cache.clear()
+        start = time.perf_counter()
+        result = processor.analyze_lyrics(lyrics)
+        total = time.perf_counter() - start
+        bars = [[word["phonetic"] for word in line["words"]] for line in result["lines"]]
+        flow = best_of(lambda: compute_flow_metrics(bars))
+        print(f"  {line_count:>5} lines  analysis {total * 1000:9.2f} ms  "
+              f"flow metrics {flow * 1000:7.2f} ms  ({flow / total:.1%})")
+
+if __name__ == "__main__":
+    main()
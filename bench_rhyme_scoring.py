@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark the phoneme-distance rhyme scorer against the previous
+suffix-matching similarity function
+"""
+import sys
+import os
+import random
+import time
+
+# Set UTF-8 encoding for Windows
+if sys.platform == 'win32':
+    os.environ['PYTHONIOENCODING'] = 'utf-8'
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from rhyme_scoring import RhymeScorer
+
+def baseline_similarity(word1_phonetic, word2_phonetic):
+    """Previous calculate_phonetic_similarity, kept as the reference"""
+    if word1_phonetic == word2_phonetic:
+        return 1.0
+    if not word1_phonetic or not word2_phonetic:
+        return 0.0
+    min_len = min(len(word1_phonetic), len(word2_phonetic))
+    suffix_matches = 0
+    for i in range(1, min_len + 1):
+        if word1_phonetic[-i] == word2_phonetic[-i]:
+            suffix_matches += 1
+        else:
+            break
+    if suffix_matches >= 2:
+        suffix_ratio = suffix_matches / min_len
+        return min(1.0, suffix_ratio * 1.2)
+    elif suffix_matches == 1 and min_len <= 3:
+        return 0.6
+    if word1_phonetic[-1] == word2_phonetic[-1]:
+        return 0.5
+    common_endings = [
+        ('et', 'at'), ('im', 'am'), ('ot', 'ut'),
+        ('tz', 'z'), ('ch', 'k'), ('sh', 's')
+    ]
+    for end1, end2 in common_endings:
+        if (word1_phonetic.endswith(end1) and word2_phonetic.endswith(end2)) or \
+           (word1_phonetic.endswith(end2) and word2_phonetic.endswith(end1)):
+            return 0.5
+    return 0.0
+
+# Letter-mapped transcriptions, as the rule-based fallback produces for
+# unvocalized words
+FALLBACK_WORDS = ['uldt', 'kspt', 'tspt', 'hlum', 'autk', 'aitk', 'ushh', 'augh',
+                  'ni', 'li', 'shiu', 'miim', 'tmid', 'bmbr', 'rchb', 'ksp']
+
+def make_ipa_words(count, rng):
+    """Generate G2P-style transcriptions with a stressed final syllable"""
+    onsets = ['b', 'g', 'd', 'k', 'l', 'm', 'n', 's', 'ʃ', 'χ', 't', 'ts', 'v', 'ʁ']
+    vowels = ['a', 'e', 'i', 'o', 'u']
+    codas = ['', 'm', 'n', 't', 'l', 'ʁ', 'χ', 'im', 'ot', 'et']
+    words = []
+    for _ in range(count):
+        syllables = [rng.choice(onsets) + rng.choice(vowels) for _ in range(rng.randint(1, 3))]
+        syllables[-1] = 'ˈ' + syllables[-1] + rng.choice(codas)
+        words.append(' '.join(''.join(syllables)))
+    return words
+
+def make_transcriptions(count, seed=42):
+    """Generate IPA-style transcriptions mixed with a quarter of fallback-style ones"""
+    rng = random.Random(seed)
+    words = make_ipa_words(count - count // 4, rng)
+    words += [rng.choice(FALLBACK_WORDS) for _ in range(count // 4)]
+    rng.shuffle(words)
+    return words
+
+def bench(name, func, pairs, repeat=5):
+    """Time func over all pairs and report the best run"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for word1, word2 in pairs:
+            func(word1, word2)
+        best = min(best, time.perf_counter() - start)
+    per_call = best / len(pairs) * 1e6
+    print(f"  {name:<28} {best * 1000:8.2f} ms total  {per_call:6.3f} us/pair")
+    return best
+
+def main():
+    """Compare pairwise and batched scoring throughput"""
+    words = make_transcriptions(400)
+    pairs = [(words[i], words[j]) for i in range(len(words)) for j in range(i + 1, len(words))]
+    scorer = RhymeScorer()
+
+    print(f"Scoring {len(pairs)} pairs from {len(words)} transcriptions")
+    print("=" * 60)
+    baseline = bench("baseline suffix match", baseline_similarity, pairs)
+    pairwise = bench("RhymeScorer.score", scorer.score, pairs)
+
+    best = float('inf')
+    for _ in range(5):
+        start = time.perf_counter()
+        for i, word in enumerate(words):
+            scorer.score_many(word, words[i + 1:])
+        best = min(best, time.perf_counter() - start)
+    print(f"  {'RhymeScorer.score_many':<28} {best * 1000:8.2f} ms total  "
+          f"{best / len(pairs) * 1e6:6.3f} us/pair")
+
+    print("=" * 60)
+    print(f"score / baseline:      {pairwise / baseline:.2f}x")
+    print(f"score_many / baseline: {best / baseline:.2f}x")
+
+if __name__ == "__main__":
+    main()
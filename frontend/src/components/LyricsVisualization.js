@@ -235,12 +235,18 @@ function LyricsVisualization({ analysis }) {
       )}
       
       <LyricsContainer>
-        {analysis.lines?.map((line, index) => (
+        {analysis.lines?.map((line, index) => {
+          // Repeated lines reference their first occurrence
+          const endWord = line.repeat_of
+            ? analysis.lines[line.repeat_of - 1]?.end_word
+            : line.end_word;
+          
+          return (
           <LineContainer key={index}>
             <LineNumber>{line.line_number}</LineNumber>
             <LineText>
               {line.text.split(' ').map((word, wordIndex) => {
-                const isEndWord = line.end_word && word.includes(line.end_word.text);
+                const isEndWord = endWord && word.includes(endWord.text);
                 const rhymeGroup = line.rhyme_group;
                 
                 if (isEndWord && rhymeGroup && rhymeGroup !== '-') {
@@ -248,7 +254,7 @@ function LyricsVisualization({ analysis }) {
                     <React.Fragment key={wordIndex}>
                       <RhymeWord 
                         rhymeGroup={rhymeGroup}
-                        title={`חרוז ${rhymeGroup}: ${line.end_word?.phonetic || ''}`}
+                        title={`חרוז ${rhymeGroup}: ${endWord?.phonetic || ''}`}
                       >
                         {word}
                       </RhymeWord>
@@ -266,7 +272,8 @@ function LyricsVisualization({ analysis }) {
               })}
             </LineText>
           </LineContainer>
-        ))}
+          );
+        })}
       </LyricsContainer>
       
       {analysis.rhyme_groups && Object.keys(analysis.rhyme_groups).length > 0 && (
@@ -304,7 +311,17 @@ function LyricsVisualization({ analysis }) {
         <StatValue>{analysis.statistics?.unique_rhymes || 0}</StatValue>
         <StatLabel>חרוזים ייחודיים</StatLabel>
       </StatCard>
-      
+
+      <StatCard>
+        <StatValue>{analysis.statistics?.syllables_per_bar ?? '—'}</StatValue>
+        <StatLabel>הברות לשורה</StatLabel>
+      </StatCard>
+
+      <StatCard>
+        <StatValue>{Math.round((analysis.statistics?.rhyme_density || 0) * 100)}%</StatValue>
+        <StatLabel>צפיפות חריזה</StatLabel>
+      </StatCard>
+
       <StatCard>
         <StatValue>{analysis.rhyme_scheme || 'לא זוהה'}</StatValue>
         <StatLabel>סכמת חריזה</StatLabel>
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Offline HTTP load test for the RapWizIL backend
+
+Starts the Flask app in process (or under gunicorn), replays a mix of
+short and long Hebrew lyrics against /analyze and /health at a fixed
+concurrency or a fixed arrival rate, and reports throughput, latency
+percentiles and error rates as JSON.
+
+Examples:
+  python load_harness.py --concurrency 4 --requests 200
+  python load_harness.py --server gunicorn --workers 2 --rate 5 --duration 30
+  python load_harness.py --url http://localhost:5000 --concurrency 8 --requests 100
+"""
+import sys
+import os
+import argparse
+import json
+import random
+import socket
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# Set UTF-8 encoding for Windows
+if sys.platform == 'win32':
+    os.environ['PYTHONIOENCODING'] = 'utf-8'
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+
+# Vocabulary for generated lyrics, taken from typical Hebrew rap lines
+VOCABULARY = [
+    'עושה', 'פו', 'הקנדלז', 'יש', 'לי', 'יום', 'הולדת', 'אפס', 'חמש', 'אחד',
+    'שתיים', 'בן', 'כן', 'עוד', 'מעט', 'בנובמבר', 'תשע', 'ארבע', 'מחביא',
+    'תסוד', 'שלי', 'בכספת', 'מביעה', 'משאלה', 'תביא', 'עוגה', 'הקצפת', 'מכין',
+    'חביתה', 'בייקון', 'אני', 'ברסלב', 'רוצה', 'להגיד', 'איך', 'שאת', 'יפה',
+    'כמו', 'שמיים', 'עכשיו', 'חלמת', 'תמיד', 'רחוב', 'לילה', 'כסף', 'חלום',
+    'מילים', 'שירים', 'בלב', 'אותך', 'איתי', 'עולם', 'זמן', 'אהבה'
+]
+
+def make_lyrics(rng, line_count):
+    """Generate lyrics with line_count lines of 3-8 words"""
+    lines = []
+    for _ in range(line_count):
+        words = [rng.choice(VOCABULARY) for _ in range(rng.randint(3, 8))]
+        lines.append(' '.join(words))
+    return '\n'.join(lines)
+
+def parse_mix(mix):
+    """Parse 'short=0.7,long=0.2,health=0.1' into a weights dict"""
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ('short', 'long', 'health'):
+            raise ValueError(f"Unknown request kind in mix: {name}")
+        weights[name] = float(weight)
+    return weights
+
+def build_workload(args):
+    """Build the deterministic list of (kind, path, body) requests"""
+    rng = random.Random(args.seed)
+    weights = parse_mix(args.mix)
+    kinds = list(weights)
+    workload = []
+    for _ in range(args.requests):
+        kind = rng.choices(kinds, weights=[weights[k] for k in kinds])[0]
+        if kind == 'health':
+            workload.append((kind, '/health', None))
+            continue
+        line_count = (rng.randint(4, 12) if kind == 'short'
+                      else rng.randint(args.long_lines // 2, args.long_lines))
+        body = json.dumps({"lyrics": make_lyrics(rng, line_count)}).encode('utf-8')
+        workload.append((kind, '/analyze', body))
+    return workload
+
+def send(base_url, path, body, timeout):
+    """Send one request and return (status, latency in seconds)"""
+    request = urllib.request.Request(
+        base_url + path,
+        data=body,
+        headers={'Content-Type': 'application/json'} if body else {},
+        method='POST' if body else 'GET'
+    )
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = 0
+    return status, time.perf_counter() - start
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+def summarize(results, elapsed):
+    """Build the JSON report from (kind, status, latency) results"""
+    def stats(entries):
+        latencies = sorted(latency for _, _, latency in entries)
+        errors = sum(1 for _, status, _ in entries if not 200 <= status < 300)
+        status_codes = {}
+        for _, status, _ in entries:
+            status_codes[str(status)] = status_codes.get(str(status), 0) + 1
+        return {
+            "requests": len(entries),
+            "errors": errors,
+            "error_rate": round(errors / len(entries), 4) if entries else 0.0,
+            "status_codes": status_codes,
+            "latency_ms": {
+                "mean": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else None,
+                "p50": round(percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+                "p95": round(percentile(latencies, 0.95) * 1000, 2) if latencies else None,
+                "p99": round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+                "max": round(latencies[-1] * 1000, 2) if latencies else None
+            }
+        }
+
+    report = stats(results)
+    report["duration_s"] = round(elapsed, 3)
+    report["throughput_rps"] = round(len(results) / elapsed, 2) if elapsed else None
+    report["by_kind"] = {
+        kind: stats([entry for entry in results if entry[0] == kind])
+        for kind in sorted({entry[0] for entry in results})
+    }
+    return report
+
+def run_fixed_concurrency(base_url, workload, concurrency, timeout):
+    """Closed loop: concurrency clients send requests back to back"""
+    results = []
+    lock = threading.Lock()
+    position = iter(range(len(workload)))
+
+    def client():
+        while True:
+            with lock:
+                idx = next(position, None)
+            if idx is None:
+                return
+            kind, path, body = workload[idx]
+            status, latency = send(base_url, path, body, timeout)
+            with lock:
+                results.append((kind, status, latency))
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - start
+
+def run_fixed_rate(base_url, workload, rate, timeout, max_in_flight):
+    """
+    Open loop: requests start at a fixed arrival rate regardless of how
+    fast earlier ones finish. Latency is measured from the scheduled start
+    so that queueing in the client is not hidden.
+    """
+    results = []
+    lock = threading.Lock()
+
+    def timed(kind, path, body, scheduled):
+        status, _ = send(base_url, path, body, timeout)
+        with lock:
+            results.append((kind, status, time.perf_counter() - scheduled))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        for idx, (kind, path, body) in enumerate(workload):
+            scheduled = start + idx / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(timed, kind, path, body, scheduled)
+    return results, time.perf_counter() - start
+
+def free_port():
+    """Pick an unused local TCP port"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def wait_until_live(base_url, timeout=120):
+    """Wait for the liveness endpoint to answer"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status, _ = send(base_url, '/health/live', None, timeout=2)
+        if status == 200:
+            return
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not become live")
+
+def start_inprocess_server():
+    """Serve the Flask app from a background thread"""
+    from werkzeug.serving import make_server
+
+    sys.path.insert(0, BACKEND_DIR)
+    from app import app
+
+    server = make_server('127.0.0.1', free_port(), app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", server.shutdown
+
+def start_gunicorn_server(args):
+    """Start the app under gunicorn in a subprocess"""
+    port = free_port()
+    command = [
+        sys.executable, '-m', 'gunicorn', '--chdir', BACKEND_DIR,
+        '--bind', f'127.0.0.1:{port}', '--workers', str(args.workers),
+        '--worker-class', args.worker_class, '--threads', str(args.threads),
+        '--log-level', 'warning', 'app:app'
+    ]
+    env = dict(os.environ, WEB_CONCURRENCY=str(args.workers))
+    process = subprocess.Popen(command, env=env)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_until_live(base_url)
+    except RuntimeError:
+        process.terminate()
+        raise
+
+    def stop():
+        process.terminate()
+        process.wait(timeout=30)
+    return base_url, stop
+
+def main():
+    """Run the load test and print the JSON report"""
+    parser = argparse.ArgumentParser(description="Load test the RapWizIL backend")
+    parser.add_argument('--server', choices=['inprocess', 'gunicorn'], default='inprocess',
+                        help="How to start the app (ignored with --url)")
+    parser.add_argument('--url', help="Test an already running server instead")
+    parser.add_argument('--workers', type=int, default=1, help="gunicorn workers")
+    parser.add_argument('--threads', type=int, default=1, help="gunicorn threads per worker")
+    parser.add_argument('--worker-class', default='sync', help="gunicorn worker class")
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help="Concurrent clients for the fixed concurrency mode")
+    parser.add_argument('--rate', type=float,
+                        help="Requests per second, switches to the fixed arrival rate mode")
+    parser.add_argument('--duration', type=float,
+                        help="Seconds to run in fixed rate mode, sets --requests")
+    parser.add_argument('--requests', type=int, default=100, help="Total requests to send")
+    parser.add_argument('--mix', default='short=0.7,long=0.2,health=0.1',
+                        help="Request mix weights for short, long and health requests")
+    parser.add_argument('--long-lines', type=int, default=200,
+                        help="Maximum line count of long lyrics")
+    parser.add_argument('--seed', type=int, default=42, help="Seed for the generated lyrics")
+    parser.add_argument('--timeout', type=float, default=60, help="Per request timeout")
+    parser.add_argument('--keep-rate-limit', action='store_true',
+                        help="Keep the API rate limiter enabled during the run")
+    parser.add_argument('--output', help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    if args.rate and args.duration:
+        args.requests = int(args.rate * args.duration)
+    if not args.keep_rate_limit:
+        os.environ['RATELIMIT_ENABLED'] = 'false'
+
+    workload = build_workload(args)
+
+    if args.url:
+        base_url, stop = args.url.rstrip('/'), None
+    elif args.server == 'gunicorn':
+        base_url, stop = start_gunicorn_server(args)
+    else:
+        base_url, stop = start_inprocess_server()
+
+    try:
+        if args.rate:
+            mode = {"mode": "fixed_rate", "rate": args.rate}
+            results, elapsed = run_fixed_rate(base_url, workload, args.rate, args.timeout,
+                                              max_in_flight=max(args.concurrency, 64))
+        else:
+            mode = {"mode": "fixed_concurrency", "concurrency": args.concurrency}
+            results, elapsed = run_fixed_concurrency(base_url, workload, args.concurrency,
+                                                     args.timeout)
+    finally:
+        if stop:
+            stop()
+
+    report = {
+        "config": dict(mode, server=args.url or args.server, workers=args.workers,
+                       threads=args.threads, worker_class=args.worker_class, mix=args.mix,
+                       long_lines=args.long_lines, seed=args.seed,
+                       rate_limit=args.keep_rate_limit),
+        "results": summarize(results, elapsed)
+    }
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+
+if __name__ == "__main__":
+    main()
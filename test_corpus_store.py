@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Check that analyzed songs round-trip through the corpus store and that
+its rhyme ending and stanza scheme queries see them
+"""
+import sys
+import os
+import tempfile
+
+# Set UTF-8 encoding for Windows
+if sys.platform == 'win32':
+    os.environ['PYTHONIOENCODING'] = 'utf-8'
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from corpus_store import CorpusStore, normalize_scheme
+from hebrew_nlp import HebrewNLPProcessor
+from rhyme_scoring import rhyme_ending
+
+def make_analysis(lines):
+    """Build an analysis result from (end word, phonetic, rhyme group) per line, None repeats line 1"""
+    result_lines = []
+    for idx, line in enumerate(lines):
+        if line is None:
+            result_lines.append({"line_number": idx + 1, "text": result_lines[0]["text"],
+                                 "repeat_of": 1, "rhyme_group": result_lines[0]["rhyme_group"]})
+            continue
+        word, phonetic, group = line
+        result_lines.append({
+            "line_number": idx + 1,
+            "text": f"שורה עם {word}",
+            "words": [{"text": word, "phonetic": phonetic}],
+            "end_word": {"text": word, "phonetic": phonetic},
+            "rhyme_group": group
+        })
+    groups = {}
+    for line in result_lines:
+        if line["rhyme_group"] != '-' and "end_word" in line:
+            groups.setdefault(line["rhyme_group"], []).append(line["end_word"]["text"])
+    return {
+        "lines": result_lines,
+        "rhyme_scheme": ''.join(line["rhyme_group"] for line in result_lines),
+        "rhyme_groups": groups
+    }
+
+# Two ABAB stanzas, the second starting with a repeat of line 1, and a
+# trailing line that does not fill a stanza
+SONG = make_analysis([
+    ('שלום', 'ʃ a ˈl o m', 'A'),
+    ('ילדה', 'j a l ˈd a', 'B'),
+    ('חלום', 'χ a ˈl o m', 'A'),
+    ('שמלה', 's i m ˈl a', 'B'),
+    None,
+    ('אהבה', 'a h a ˈv a', 'B'),
+    ('מקום', 'm a ˈk o m', 'A'),
+    ('ברכה', 'b ʁ a ˈχ a', 'B'),
+    ('רחוב', 'ʁ e ˈχ o v', '-'),
+])
+
+def open_store(directory):
+    """Corpus store in a fresh database file"""
+    return CorpusStore(os.path.join(directory, 'corpus.db'))
+
+def test_normalize_scheme():
+    """Schemes are re-lettered by first appearance"""
+    assert normalize_scheme('CDCD') == 'ABAB'
+    assert normalize_scheme('B-B-') == 'A-A-'
+    assert normalize_scheme('BBAA') == 'AABB'
+
+def test_round_trip():
+    """A stored song is counted once and keeps its signature"""
+    with tempfile.TemporaryDirectory() as directory:
+        store = open_store(directory)
+        song_id = store.save_analysis(SONG, 'hash-1', title='שיר', signature=b'\x01\x02')
+        assert store.save_analysis(SONG, 'hash-1', title='שיר') == song_id
+        assert store.stats() == {"songs": 1, "lines": 9}
+        assert store.song_titles([song_id]) == {song_id: 'שיר'}
+        assert list(store.iter_signatures()) == [(song_id, b'\x01\x02')]
+        assert list(store.iter_signatures(after_id=song_id)) == []
+
+        # A second connection sees the committed song
+        assert open_store(directory).stats()["songs"] == 1
+
+def test_songs_with_ending():
+    """Lines are indexed by rhyme ending, repeated lines through their source"""
+    with tempfile.TemporaryDirectory() as directory:
+        store = open_store(directory)
+        song_id = store.save_analysis(SONG, 'hash-1', title='שיר')
+        other_id = store.save_analysis(make_analysis([('היום', 'h a ˈj o m', 'A')]), 'hash-2')
+
+        ending = rhyme_ending('ʃ a ˈl o m')
+        assert ending == 'om'
+        matches = store.songs_with_ending(ending)
+        assert [match["song_id"] for match in matches] == [song_id, other_id]
+        assert matches[0]["lines"] == 4
+        assert sorted(matches[0]["words"]) == sorted(['שלום', 'חלום', 'מקום'])
+        assert store.songs_with_ending(ending, limit=1)[0]["song_id"] == song_id
+        assert store.songs_with_ending('ut') == []
+
+def test_common_schemes():
+    """Only full stanzas are counted, by normalized scheme"""
+    with tempfile.TemporaryDirectory() as directory:
+        store = open_store(directory)
+        store.save_analysis(SONG, 'hash-1')
+        store.save_analysis(make_analysis([
+            ('ילדה', 'j a l ˈd a', 'C'),
+            ('ילדה', 'j a l ˈd a', 'C'),
+            ('שלום', 'ʃ a ˈl o m', 'D'),
+            ('חלום', 'χ a ˈl o m', 'D'),
+        ]), 'hash-2')
+
+        assert store.common_schemes() == [
+            {"scheme": "ABAB", "stanzas": 2, "songs": 1},
+            {"scheme": "AABB", "stanzas": 1, "songs": 1}
+        ]
+        assert store.common_schemes(limit=1) == [{"scheme": "ABAB", "stanzas": 2, "songs": 1}]
+
+def test_real_analysis_round_trip():
+    """The output of analyze_lyrics can be stored as is"""
+    lyrics = """אני רק רוצה להגיד לך איך
+שאת יפה כמו שמיים
+אני רק רוצה להגיד לך איך
+שאת חלמת שלי תמיד"""
+    analysis = HebrewNLPProcessor().analyze_lyrics(lyrics)
+    with tempfile.TemporaryDirectory() as directory:
+        store = open_store(directory)
+        store.save_analysis(analysis, 'hash-1')
+        assert store.stats() == {"songs": 1, "lines": 4}
+        assert sum(scheme["stanzas"] for scheme in store.common_schemes()) == 1
+
+if __name__ == "__main__":
+    test_normalize_scheme()
+    test_round_trip()
+    test_songs_with_ending()
+    test_common_schemes()
+    test_real_analysis_round_trip()
+    print("[OK] Corpus store")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Check that the G2P model pool serves waiting threads in arrival order
+"""
+import sys
+import os
+import threading
+import time
+
+# Set UTF-8 encoding for Windows
+if sys.platform == 'win32':
+    os.environ['PYTHONIOENCODING'] = 'utf-8'
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from model_pool import ModelPool
+
+def test_short_checkout_not_starved():
+    """A single checkout gets the instance while another thread loops over the pool"""
+    pool = ModelPool(object, size=1)
+    stop = threading.Event()
+    # Bounded, so that a starving pool fails the test instead of hanging it
+    give_up = time.monotonic() + 2.0
+
+    def tight_loop():
+        while not stop.is_set() and time.monotonic() < give_up:
+            with pool.checkout():
+                time.sleep(0.005)
+
+    looper = threading.Thread(target=tight_loop)
+    looper.start()
+    try:
+        time.sleep(0.02)
+        start = time.perf_counter()
+        with pool.checkout():
+            waited = time.perf_counter() - start
+    finally:
+        stop.set()
+        looper.join()
+
+    print(f"Short checkout waited {waited * 1000:.1f} ms behind a 5 ms loop")
+    assert waited < 0.1, f"short checkout starved for {waited:.3f}s"
+    assert pool.stats()["in_use"] == 0
+
+def test_waiters_served_in_order():
+    """Blocked threads receive the instance in the order they asked for it"""
+    pool = ModelPool(object, size=1)
+    order = []
+
+    def worker(idx):
+        with pool.checkout():
+            order.append(idx)
+
+    with pool.checkout():
+        threads = []
+        for idx in range(5):
+            thread = threading.Thread(target=worker, args=(idx,))
+            thread.start()
+            threads.append(thread)
+            while pool.stats()["waiting"] < idx + 1:
+                time.sleep(0.001)
+    for thread in threads:
+        thread.join()
+
+    print(f"Waiters served in order {order}")
+    assert order == list(range(5))
+
+if __name__ == "__main__":
+    test_short_checkout_not_starved()
+    test_waiters_served_in_order()
+    print("[OK] Model pool is fair")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Check MinHash similarity estimates and LSH candidate selection for
+near-duplicate songs
+"""
+import sys
+import os
+import random
+
+# Set UTF-8 encoding for Windows
+if sys.platform == 'win32':
+    os.environ['PYTHONIOENCODING'] = 'utf-8'
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+import numpy as np
+
+from near_duplicates import (SIGNATURE_BLOCK, LSHIndex, MinHasher, estimate_similarity,
+                             phonetic_shingles)
+
+def shingle_sets(similarity, size=2000, seed=0):
+    """Two random shingle sets with the given Jaccard similarity"""
+    rng = random.Random(seed)
+    values = rng.sample(range(2 ** 32), 2 * size)
+    shared = round(size * 2 * similarity / (1 + similarity))
+    first = set(values[:size])
+    second = set(values[:shared]) | set(values[size:2 * size - shared])
+    return first, second
+
+def test_phonetic_shingles():
+    """Shingles are taken across word boundaries and ignore phoneme spacing"""
+    assert phonetic_shingles(['ʃ a l o m']) == phonetic_shingles(['ʃalom'])
+    assert phonetic_shingles([]) == set()
+    assert len(phonetic_shingles(['ab'])) == 1
+    assert phonetic_shingles(['ʃ a l o m', 'h a j o m']) != phonetic_shingles(['ʃalom', 'haj', 'om'])
+
+def test_signature_blocks():
+    """Hashing in blocks gives the same signature as one pass over all shingles"""
+    hasher = MinHasher()
+    shingles = set(random.Random(1).sample(range(2 ** 32), 3 * SIGNATURE_BLOCK + 17))
+    values = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+    prime = np.uint64(4294967311)
+    one_pass = ((hasher._a[:, None] * values[None, :] % prime + hasher._b[:, None]) % prime
+                & np.uint64(0xFFFFFFFF)).min(axis=1).astype(np.uint32)
+    assert np.array_equal(hasher.signature(shingles), one_pass)
+    assert np.array_equal(hasher.signature(set()), np.full(hasher.num_perm, 0xFFFFFFFF, dtype=np.uint32))
+
+def test_similarity_estimate():
+    """Signature agreement tracks the Jaccard similarity of the shingle sets"""
+    hasher = MinHasher()
+    for similarity in (0.2, 0.5, 0.9):
+        first, second = shingle_sets(similarity)
+        estimate = estimate_similarity(hasher.signature(first), hasher.signature(second))
+        assert abs(estimate - similarity) < 0.12, (similarity, estimate)
+
+def test_lsh_candidates_and_threshold():
+    """Similar songs are found through shared bands, dissimilar ones are not"""
+    hasher = MinHasher()
+    index = LSHIndex()
+    query, near_copy = shingle_sets(0.9, seed=1)
+    _, remix = shingle_sets(0.6, seed=1)
+    unrelated = set(random.Random(2).sample(range(2 ** 32), 2000))
+    for key, shingles in ((1, near_copy), (2, remix), (3, unrelated)):
+        index.add(key, hasher.signature(shingles))
+    index.add(1, hasher.signature(unrelated))
+    assert len(index) == 3
+
+    signature = hasher.signature(query)
+    results = index.query(signature, threshold=0.5)
+    assert [key for key, _ in results] == [1, 2]
+    assert results[0][1] > results[1][1] >= 0.5
+    assert [key for key, _ in index.query(signature, threshold=0.8)] == [1]
+    assert index.query(signature, threshold=0.5, limit=1) == results[:1]
+    assert index.query(hasher.signature({1, 2, 3})) == []
+
+if __name__ == "__main__":
+    test_phonetic_shingles()
+    test_signature_blocks()
+    test_similarity_estimate()
+    test_lsh_candidates_and_threshold()
+    print("[OK] Near-duplicate detection")
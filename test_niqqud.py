@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Check the rule-based transliteration of vocalized Hebrew words
+"""
+import sys
+import os
+
+# Set UTF-8 encoding for Windows
+if sys.platform == 'win32':
+    os.environ['PYTHONIOENCODING'] = 'utf-8'
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from niqqud import strip_cantillation, transliterate
+
+# (vocalized word, expected transcription)
+EXPECTED = [
+    ('שָׁלוֹם', 'ʃ a l o m'),         # holam male
+    ('חֲלוֹם', 'χ a l o m'),          # hataf patah
+    ('אֲנִי', 'a n i'),               # silent yod after hiriq
+    ('בַּיִת', 'b a j i t'),           # consonantal yod, dagesh in bet
+    ('מֶלֶךְ', 'm e l e χ'),           # soft final kaf
+    ('תּוֹרָה', 't o ʁ a'),            # silent final he
+    ('רוּחַ', 'ʁ u a χ'),              # shuruk, patah genuvah
+    ('שִׂמְחָה', 's i m χ a'),         # sin dot, silent sheva
+    ('בְּרֵאשִׁית', 'b e ʁ e ʃ i t'),   # vocal sheva, silent alef
+    ('עַכְשָׁיו', 'a χ ʃ a v'),         # suffix -ָיו
+    ('יָדָיו', 'j a d a v'),            # suffix -ָיו
+]
+
+def test_transliteration():
+    """Vocalized words are transliterated to their expected phonemes"""
+    failures = []
+    for word, expected in EXPECTED:
+        result = transliterate(word)
+        ok = result == expected
+        print(f"  [{'OK' if ok else 'FAIL'}] {expected:<16} {result}")
+        if not ok:
+            failures.append((expected, result))
+    assert not failures, f"Wrong transliterations: {failures}"
+
+def test_cantillation_removed():
+    """Te'amim are stripped so that words keep their endings"""
+    assert strip_cantillation('בְּרֵאשִׁ֖ית בָּרָ֣א') == 'בְּרֵאשִׁית בָּרָא'
+    assert transliterate(strip_cantillation('בְּרֵאשִׁ֖ית')) == 'b e ʁ e ʃ i t'
+
+if __name__ == "__main__":
+    test_transliteration()
+    test_cantillation_removed()
+    print("[OK] Transliteration rules")
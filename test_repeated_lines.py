@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Check that repeated lines and choruses are detected and analyzed once
+"""
+import sys
+import os
+
+# Set UTF-8 encoding for Windows
+if sys.platform == 'win32':
+    os.environ['PYTHONIOENCODING'] = 'utf-8'
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from hebrew_nlp import HebrewNLPProcessor
+
+CHORUS = """אני רק רוצה להגיד לך איך
+שאת יפה כמו שמיים
+אני רק רוצה להגיד לך עכשיו
+שאת חלמת שלי תמיד"""
+
+# Verse, chorus, a line of its own, the chorus again with different
+# punctuation, then its first line once more on its own
+LYRICS = "\n".join([
+    "יום הולדת בנובמבר",
+    CHORUS,
+    "חביתה עם הקצפת",
+    CHORUS.replace("איך", "איך!").replace("שמיים", "שמיים,"),
+    "אני רק רוצה להגיד לך איך",
+])
+
+def test_find_repeated_lines():
+    """Repeated lines point to their first occurrence, punctuation ignored"""
+    processor = HebrewNLPProcessor()
+    lines = processor.preprocess_text(LYRICS).split('\n')
+    assert processor.find_repeated_lines(lines) == [None, None, None, None, None, None, 1, 2, 3, 4, 1]
+
+def test_find_repeated_sections():
+    """Consecutive repeated lines form one section, single repeats do not"""
+    processor = HebrewNLPProcessor()
+    sections = processor.find_repeated_sections([None, None, None, 0, 1, None, 0, 1, 2])
+    assert sections == [
+        {"start_line": 4, "end_line": 5, "repeat_of": 1},
+        {"start_line": 7, "end_line": 9, "repeat_of": 1}
+    ]
+    assert processor.find_repeated_sections([None, None, 0, None, 1]) == []
+
+def test_repeats_reference_first_occurrence():
+    """Repeated lines carry repeat_of instead of their own word data"""
+    result = HebrewNLPProcessor().analyze_lyrics(LYRICS)
+    assert result["statistics"]["repeated_lines"] == 5
+    assert result["repeated_sections"] == [{"start_line": 7, "end_line": 10, "repeat_of": 2}]
+    repeated = result["lines"][6]
+    assert repeated["repeat_of"] == 2
+    assert "words" not in repeated and "end_word" not in repeated
+
+def test_expand_repeats_same_output():
+    """Expanding repeats only copies the word data of the first occurrence"""
+    processor = HebrewNLPProcessor()
+    compact = processor.analyze_lyrics(LYRICS)
+    expanded = processor.analyze_lyrics(LYRICS, expand_repeats=True)
+    for key in ("rhyme_scheme", "rhyme_groups", "repeated_sections", "statistics"):
+        assert compact[key] == expanded[key], key
+    for compact_line, expanded_line in zip(compact["lines"], expanded["lines"]):
+        source_idx = expanded_line.get("repeat_of")
+        if source_idx is None:
+            assert compact_line == expanded_line
+            continue
+        source = expanded["lines"][source_idx - 1]
+        assert expanded_line["words"] == source["words"]
+        assert expanded_line["end_word"] == source["end_word"]
+        assert {key: value for key, value in expanded_line.items()
+                if key not in ("words", "end_word")} == compact_line
+
+if __name__ == "__main__":
+    test_find_repeated_lines()
+    test_find_repeated_sections()
+    test_repeats_reference_first_occurrence()
+    test_expand_repeats_same_output()
+    print("[OK] Repeated lines")
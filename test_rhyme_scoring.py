@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Check the rhyme scorer against known rhyming and non-rhyming word pairs
+"""
+import sys
+import os
+
+# Set UTF-8 encoding for Windows
+if sys.platform == 'win32':
+    os.environ['PYTHONIOENCODING'] = 'utf-8'
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from hebrew_nlp import HebrewNLPProcessor
+from rhyme_scoring import RhymeScorer, RHYME_THRESHOLD
+
+# (transcription, transcription, note)
+RHYMES = [
+    ('ʃaˈlom', 'haˈjom', 'שלום / היום'),
+    ('χaˈlom', 'maˈkom', 'חלום / מקום'),
+    ('jalˈda', 'simˈla', 'ילדה / שמלה'),
+    ('ahaˈva', 'bʁaˈχa', 'אהבה / ברכה'),
+    ('ˈbajit', 'ˈzajit', 'בית / זית'),
+    ('ˈlev', 'keˈev', 'לב / כאב'),
+    ('kasˈpet', 'katsˈpet', 'כספת / קצפת'),
+    ('ʁeˈχov', 'ʃaˈχov', 'רחוב / שכוב'),
+    ('ˈkam', 'ˈgan', 'nasal slant rhyme'),
+    ('ˈjad', 'ˈbat', 'voicing slant rhyme'),
+    ('ˈχom', 'ˈkum', 'o / u slant rhyme'),
+]
+
+NON_RHYMES = [
+    ('ʃalˈom', 'ˈtov', 'שלום / טוב'),
+    ('ʃaˈna', 'ˈsaft', 'open vs. closed syllable'),
+    ('jeˈled', 'jaˈʁok', 'ילד / ירוק'),
+    ('ˈdam', 'ˈdom', 'different stressed vowel'),
+    ('ˈʃir', 'ˈʃit', 'unrelated final consonant'),
+    ('kaˈtav', 'kaˈtan', 'fricative vs. nasal'),
+    ('ʃaˈlom', 'ʃaˈlof', 'nasal vs. fricative'),
+]
+
+# Unvocalized words transcribed by the rule-based fallback: (word, word, rhymes)
+FALLBACK_PAIRS = [
+    ('הולדת', 'בכספת', True),
+    ('בכספת', 'הקצפת', True),
+    ('אותך', 'איתך', True),
+    ('עושה', 'עוגה', False),
+    ('הולדת', 'שלום', False),
+]
+
+def test_known_pairs():
+    """Known rhymes score at or above the threshold, non-rhymes below it"""
+    scorer = RhymeScorer()
+    failures = []
+    for pairs, rhymes in ((RHYMES, True), (NON_RHYMES, False)):
+        for word1, word2, note in pairs:
+            score = scorer.score(word1, word2)
+            ok = (score >= RHYME_THRESHOLD) == rhymes
+            print(f"  [{'OK' if ok else 'FAIL'}] {word1:<10} {word2:<10} {score:.2f}  {note}")
+            if not ok:
+                failures.append((word1, word2, score))
+    assert not failures, f"Misjudged pairs: {failures}"
+
+def fallback_pairs():
+    """FALLBACK_PAIRS with the words replaced by their fallback transcriptions"""
+    processor = HebrewNLPProcessor()
+    return [(processor.fallback_transcription(word1), processor.fallback_transcription(word2),
+             f"{word1} / {word2}", rhymes) for word1, word2, rhymes in FALLBACK_PAIRS]
+
+def test_fallback_pairs():
+    """Letter-mapped transcriptions are judged on their final letters"""
+    scorer = RhymeScorer()
+    failures = []
+    for phonetic1, phonetic2, note, rhymes in fallback_pairs():
+        score = scorer.score(phonetic1, phonetic2)
+        ok = (score >= RHYME_THRESHOLD) == rhymes
+        print(f"  [{'OK' if ok else 'FAIL'}] {phonetic1:<10} {phonetic2:<10} {score:.2f}  {note}")
+        if not ok:
+            failures.append((note, score))
+    assert not failures, f"Misjudged pairs: {failures}"
+
+def test_score_many_matches_score():
+    """The batched scorer agrees with pairwise scoring on the same table"""
+    scorer = RhymeScorer()
+    pairs = [(word1, word2) for word1, word2, _ in RHYMES + NON_RHYMES]
+    pairs += [(phonetic1, phonetic2) for phonetic1, phonetic2, _, _ in fallback_pairs()]
+    for word1, word2 in pairs:
+        batched = scorer.score_many(word1, [word2])[0]
+        assert abs(batched - scorer.score(word1, word2)) < 1e-5, (word1, word2)
+    # Mixed batches take the vowel and letter paths side by side
+    candidates = [word for pair in pairs for word in pair]
+    for word in ('ʃaˈlom', 'uldt'):
+        batched = scorer.score_many(word, candidates)
+        for candidate, score in zip(candidates, batched):
+            assert abs(score - scorer.score(word, candidate)) < 1e-5, (word, candidate)
+
+if __name__ == "__main__":
+    print(f"Rhyme threshold {RHYME_THRESHOLD}")
+    test_known_pairs()
+    test_fallback_pairs()
+    test_score_many_matches_score()
+    print("[OK] Known pairs judged correctly")
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Check that concurrent identical analyses are coalesced into one computation
+"""
+import sys
+import os
+import threading
+
+# Set UTF-8 encoding for Windows
+if sys.platform == 'win32':
+    os.environ['PYTHONIOENCODING'] = 'utf-8'
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from single_flight import SingleFlight, make_key
+
+def run_followers(flight, key, fn, count):
+    """Start count callers of flight.do once the leader is in flight, collect their outcomes"""
+    outcomes = []
+    lock = threading.Lock()
+
+    def follower():
+        try:
+            outcome = flight.do(key, fn, timeout=5)
+        except Exception as e:
+            outcome = e
+        with lock:
+            outcomes.append(outcome)
+
+    threads = [threading.Thread(target=follower) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+def wait_for_followers(flight, count):
+    """Wait until count callers are queued behind the leader"""
+    for _ in range(500):
+        if flight.stats()["coalesced"] >= count:
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError("Followers did not join the in-flight computation")
+
+def test_result_shared():
+    """Callers arriving while a computation runs get its result without running it"""
+    flight = SingleFlight()
+    key = make_key("lyrics", ("profile", "full"))
+    started, release = threading.Event(), threading.Event()
+    calls = []
+    leader_result = []
+
+    def compute():
+        calls.append(key)
+        started.set()
+        release.wait(5)
+        return {"rhyme_scheme": "AABB"}
+
+    leader = threading.Thread(target=lambda: leader_result.append(flight.do(key, compute)))
+    leader.start()
+    assert started.wait(5)
+    threads, outcomes = run_followers(flight, key, compute, 4)
+    wait_for_followers(flight, 4)
+    release.set()
+    for thread in threads + [leader]:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert leader_result + outcomes == [{"rhyme_scheme": "AABB"}] * 5
+    assert flight.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 4}
+
+def test_error_propagated():
+    """An exception of the computation is raised in every waiting caller"""
+    flight = SingleFlight()
+    key = make_key("broken lyrics")
+    started, release = threading.Event(), threading.Event()
+
+    def compute():
+        started.set()
+        release.wait(5)
+        raise ValueError("analysis failed")
+
+    leader_error = []
+
+    def leader():
+        try:
+            flight.do(key, compute)
+        except ValueError as e:
+            leader_error.append(e)
+
+    leader_thread = threading.Thread(target=leader)
+    leader_thread.start()
+    assert started.wait(5)
+    threads, outcomes = run_followers(flight, key, compute, 3)
+    wait_for_followers(flight, 3)
+    release.set()
+    for thread in threads + [leader_thread]:
+        thread.join(5)
+
+    assert len(leader_error) == 1
+    assert len(outcomes) == 3 and all(outcome is leader_error[0] for outcome in outcomes)
+    # Nothing is kept, the next caller runs the computation again
+    assert flight.do(key, lambda: "retried") == "retried"
+
+def test_distinct_keys_not_coalesced():
+    """Different options give different keys and separate computations"""
+    assert make_key("lyrics", ("profile", "full")) != make_key("lyrics", ("profile", "fast"))
+    flight = SingleFlight()
+    assert flight.do(make_key("a"), lambda: 1) == 1
+    assert flight.do(make_key("b"), lambda: 2) == 2
+    assert flight.stats()["leaders"] == 2
+
+if __name__ == "__main__":
+    test_result_shared()
+    test_error_propagated()
+    test_distinct_keys_not_coalesced()
+    print("[OK] Single-flight coalescing")
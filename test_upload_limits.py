@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Check that the upload size limit applies to /analyze/upload only
+"""
+import sys
+import os
+import io
+import json
+
+# Set UTF-8 encoding for Windows
+if sys.platform == 'win32':
+    os.environ['PYTHONIOENCODING'] = 'utf-8'
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+os.environ.setdefault('RATELIMIT_ENABLED', 'false')
+
+from app import app, ANALYSIS_MAX_UPLOAD_BYTES
+
+OVERSIZED = ANALYSIS_MAX_UPLOAD_BYTES + 128 * 1024
+
+def test_oversized_json_is_not_limited():
+    """A large JSON body to /analyze is parsed instead of failing with 413 or 500"""
+    body = json.dumps({"lyrics": " ", "padding": "x" * OVERSIZED})
+    with app.test_client() as client:
+        response = client.post('/analyze', data=body, content_type='application/json')
+    assert response.status_code == 400, response.status_code
+    assert response.get_json()["error"] == "Lyrics cannot be empty"
+
+def test_oversized_text_upload():
+    """A text/plain upload above the limit is rejected"""
+    with app.test_client() as client:
+        response = client.post('/analyze/upload', data=b'x' * OVERSIZED, content_type='text/plain')
+    assert response.status_code == 413, response.status_code
+    assert response.get_json()["success"] is False
+
+def test_oversized_multipart_upload():
+    """A multipart upload above the limit is rejected"""
+    data = {"file": (io.BytesIO(b'x' * OVERSIZED), 'lyrics.txt')}
+    with app.test_client() as client:
+        response = client.post('/analyze/upload', data=data, content_type='multipart/form-data')
+    assert response.status_code == 413, response.status_code
+    assert response.get_json()["success"] is False
+
+def test_upload_within_limit():
+    """A small text/plain upload is analyzed"""
+    lyrics = "אני רק רוצה להגיד לך איך\nשאת יפה כמו שמיים\n".encode('utf-8')
+    with app.test_client() as client:
+        response = client.post('/analyze/upload', data=lyrics, content_type='text/plain')
+    assert response.status_code == 200, response.status_code
+    assert len(response.get_json()["data"]["lines"]) == 2
+
+if __name__ == "__main__":
+    test_oversized_json_is_not_limited()
+    test_oversized_text_upload()
+    test_oversized_multipart_upload()
+    test_upload_within_limit()
+    print("[OK] Upload limits")